@@ -1,17 +1,25 @@
 from __future__ import annotations
 
+import argparse
+import hashlib
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Iterable, Optional, Tuple
+from typing import Callable, Iterable, Optional, Tuple
 
 from PIL import Image, ImageDraw, ImageFilter, ImageFont, ImageOps
 
 
 ROOT = Path(__file__).resolve().parents[2]
 OUT_DIR = ROOT / "docs" / "images"
+CACHE_DIR = ROOT / "data" / "render_diagrams"
 
 WIDTH = 2916
 HEIGHT = 1655
 ICON_SIZE = 52
+BACKGROUND_FILL = (5, 8, 10, 255)
+RAIN_SEED = 20251220
 
 ARROW_TRAFFIC = (140, 245, 220)
 ARROW_CONTROL = (96, 210, 178)
@@ -58,20 +66,22 @@ def load_font(size: int, mono: bool = False) -> ImageFont.FreeTypeFont:
 
 
 def draw_vertical_gradient(base: Image.Image) -> None:
-    gradient = Image.new("RGBA", base.size, (0, 0, 0, 0))
-    gdraw = ImageDraw.Draw(gradient)
     top = COLORS["bg_top"]
     bottom = COLORS["bg_bottom"]
-    for y in range(HEIGHT):
-        t = y / HEIGHT
-        color = (
-            int(top[0] + (bottom[0] - top[0]) * t),
-            int(top[1] + (bottom[1] - top[1]) * t),
-            int(top[2] + (bottom[2] - top[2]) * t),
-            255,
-        )
-        gdraw.line([(0, y), (WIDTH, y)], fill=color)
-    base.alpha_composite(gradient)
+    column = Image.new("RGBA", (1, HEIGHT))
+    column.putdata(
+        [
+            (
+                int(top[0] + (bottom[0] - top[0]) * t),
+                int(top[1] + (bottom[1] - top[1]) * t),
+                int(top[2] + (bottom[2] - top[2]) * t),
+                255,
+            )
+            for t in (y / HEIGHT for y in range(HEIGHT))
+        ]
+    )
+    # Opaque, so stretching one column and pasting it matches compositing it.
+    base.paste(column.resize(base.size, Image.Resampling.NEAREST))
 
 
 def draw_glow_fields(base: Image.Image) -> None:
@@ -85,30 +95,30 @@ def draw_glow_fields(base: Image.Image) -> None:
 
 
 def draw_grid(base: Image.Image) -> None:
-    grid = Image.new("RGBA", base.size, (0, 0, 0, 0))
-    gdraw = ImageDraw.Draw(grid)
+    # Composite each 1 px line on its own; crossings take the horizontal line's colour.
+    vertical = Image.new("RGBA", (1, HEIGHT), (*COLORS["grid"], 36))
+    ImageDraw.Draw(vertical).point([(0, y) for y in range(0, HEIGHT, 84)], fill=(0, 0, 0, 0))
+    horizontal = Image.new("RGBA", (WIDTH, 1), (*COLORS["grid"], 30))
     for x in range(0, WIDTH, 84):
-        gdraw.line([(x, 0), (x, HEIGHT)], fill=(*COLORS["grid"], 36))
+        base.alpha_composite(vertical, dest=(x, 0))
     for y in range(0, HEIGHT, 84):
-        gdraw.line([(0, y), (WIDTH, y)], fill=(*COLORS["grid"], 30))
-    base.alpha_composite(grid)
+        base.alpha_composite(horizontal, dest=(0, y))
 
 
 def draw_scanlines(base: Image.Image) -> None:
-    scan = Image.new("RGBA", base.size, (0, 0, 0, 0))
-    sdraw = ImageDraw.Draw(scan)
+    bright = Image.new("RGBA", (WIDTH, 1), (255, 255, 255, 8))
+    dim = Image.new("RGBA", (WIDTH, 1), (255, 255, 255, 4))
     for y in range(0, HEIGHT, 5):
-        alpha = 8 if y % 10 == 0 else 4
-        sdraw.line([(0, y), (WIDTH, y)], fill=(255, 255, 255, alpha))
-    base.alpha_composite(scan)
+        base.alpha_composite(bright if y % 10 == 0 else dim, dest=(0, y))
 
 
-def draw_matrix_rain(base: Image.Image, seed: int = 20251220) -> None:
+def draw_matrix_rain(base: Image.Image, seed: int = RAIN_SEED) -> None:
     import random
 
     rng = random.Random(seed)
     rain = Image.new("RGBA", base.size, (0, 0, 0, 0))
     rdraw = ImageDraw.Draw(rain)
+    columns = []
     for x in range(40, WIDTH, 44):
         if rng.random() < 0.35:
             start = rng.randint(-200, HEIGHT)
@@ -118,8 +128,13 @@ def draw_matrix_rain(base: Image.Image, seed: int = 20251220) -> None:
                 alpha = int(14 + 40 * rng.random())
                 rdraw.rectangle([x, y, x + 2, y + 12], fill=(18, 200, 140, alpha))
             rdraw.rectangle([x, head - 8, x + 3, head + 14], fill=(180, 255, 220, 160))
-    rain = rain.filter(ImageFilter.GaussianBlur(0.6))
-    base.alpha_composite(rain)
+            columns.append(x)
+    # Columns sit further apart than the blur reaches, so blurring each column's
+    # band gives the same pixels as blurring the whole canvas.
+    reach = glow_reach(0.6)
+    for x in columns:
+        box = (max(x - reach, 0), 0, min(x + 4 + reach, WIDTH), HEIGHT)
+        base.alpha_composite(rain.crop(box).filter(ImageFilter.GaussianBlur(0.6)), dest=box[:2])
 
 
 def draw_vignette(base: Image.Image) -> None:
@@ -132,18 +147,19 @@ def draw_vignette(base: Image.Image) -> None:
 
 
 def draw_hud_frame(base: Image.Image) -> None:
-    hud = Image.new("RGBA", base.size, (0, 0, 0, 0))
-    hdraw = ImageDraw.Draw(hud)
     color = (*COLORS["accent"], 120)
     for (x, y) in [(36, 40), (WIDTH - 36, 40), (36, HEIGHT - 40), (WIDTH - 36, HEIGHT - 40)]:
         x0 = x - (0 if x < WIDTH / 2 else 120)
         x1 = x + (120 if x < WIDTH / 2 else 0)
         y0 = y - (0 if y < HEIGHT / 2 else 80)
         y1 = y + (80 if y < HEIGHT / 2 else 0)
-        hdraw.line([(x0, y), (x1, y)], fill=color, width=3)
-        hdraw.line([(x, y0), (x, y1)], fill=color, width=3)
-    hud = hud.filter(ImageFilter.GaussianBlur(0.6))
-    base.alpha_composite(hud)
+
+        def paint(hdraw: ImageDraw.ImageDraw, dx: int, dy: int) -> None:
+            hdraw.line([(x0 + dx, y + dy), (x1 + dx, y + dy)], fill=color, width=3)
+            hdraw.line([(x + dx, y0 + dy), (x + dx, y1 + dy)], fill=color, width=3)
+
+        # The corners are far apart, so blurring each one alone is exact.
+        draw_glow(base, (x0 - 2, y0 - 2, x1 + 2, y1 + 2), 0.6, paint)
 
 
 def draw_background(draw: ImageDraw.ImageDraw, base: Image.Image) -> None:
@@ -156,13 +172,87 @@ def draw_background(draw: ImageDraw.ImageDraw, base: Image.Image) -> None:
     draw_hud_frame(base)
 
 
+_background: Optional[Image.Image] = None
+
+
+def background_key() -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((WIDTH, HEIGHT, BACKGROUND_FILL, RAIN_SEED, sorted(COLORS.items()))).encode())
+    digest.update(Path(__file__).read_bytes())
+    return digest.hexdigest()
+
+
+def build_background() -> Image.Image:
+    base = Image.new("RGBA", (WIDTH, HEIGHT), BACKGROUND_FILL)
+    draw_background(ImageDraw.Draw(base), base)
+    return base
+
+
+def save_background(path: Path, background: Image.Image) -> None:
+    # Best effort: a read-only checkout still renders, it just rebuilds the background.
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        background.save(tmp, format="PNG", compress_level=1)
+        os.replace(tmp, path)
+        for stale in path.parent.glob("background-*.png"):
+            if stale != path:
+                stale.unlink()
+    except OSError:
+        pass
+
+
+def load_background() -> Image.Image:
+    # The background is identical for every diagram: build it once per process, keep it
+    # on disk keyed by its parameters and this script, and hand out copies to draw on.
+    global _background
+    if _background is None:
+        path = CACHE_DIR / f"background-{background_key()}.png"
+        try:
+            with Image.open(path) as cached:
+                if cached.size != (WIDTH, HEIGHT):
+                    raise ValueError(path)
+                _background = cached.convert("RGBA")
+        except (OSError, ValueError):
+            _background = build_background()
+            save_background(path, _background)
+    return _background.copy()
+
+
+def glow_reach(blur: float) -> int:
+    # GaussianBlur is three box blurs, each spreading at most blur + 1 px.
+    return 3 * (math.ceil(blur) + 1)
+
+
+def draw_glow(
+    base: Image.Image,
+    bbox: Tuple[float, float, float, float],
+    blur: float,
+    paint: Callable[[ImageDraw.ImageDraw, int, int], None],
+) -> None:
+    # Blur only the element's bbox plus the blur's reach instead of a full-canvas layer.
+    # `paint` draws with its coordinates shifted by (dx, dy). Clipping the layer to the
+    # canvas keeps Pillow's edge handling, so the result matches a full-frame blur exactly.
+    reach = glow_reach(blur)
+    left = max(math.floor(bbox[0]) - reach, 0)
+    top = max(math.floor(bbox[1]) - reach, 0)
+    right = min(math.ceil(bbox[2]) + reach + 1, base.width)
+    bottom = min(math.ceil(bbox[3]) + reach + 1, base.height)
+    if left >= right or top >= bottom:
+        return
+    glow = Image.new("RGBA", (right - left, bottom - top), (0, 0, 0, 0))
+    paint(ImageDraw.Draw(glow), -left, -top)
+    glow = glow.filter(ImageFilter.GaussianBlur(blur))
+    base.alpha_composite(glow, dest=(left, top))
+
+
 def draw_text_glow(base: Image.Image, position: Tuple[int, int], text: str, font: ImageFont.FreeTypeFont) -> None:
-    glow = Image.new("RGBA", base.size, (0, 0, 0, 0))
-    gdraw = ImageDraw.Draw(glow)
-    gdraw.text(position, text, font=font, fill=(*COLORS["accent"], 140))
-    glow = glow.filter(ImageFilter.GaussianBlur(10))
-    base.alpha_composite(glow)
     draw = ImageDraw.Draw(base)
+
+    def paint(gdraw: ImageDraw.ImageDraw, dx: int, dy: int) -> None:
+        gdraw.text((position[0] + dx, position[1] + dy), text, font=font, fill=(*COLORS["accent"], 140))
+
+    draw_glow(base, draw.textbbox(position, text, font=font), 10, paint)
     draw.text((position[0] + 2, position[1] + 2), text, font=font, fill=(0, 0, 0, 160))
     draw.text(position, text, font=font, fill=(*COLORS["text"], 255))
 
@@ -331,11 +421,10 @@ def draw_card(
     x0, y0, x1, y1 = rect
     radius = 26
 
-    glow = Image.new("RGBA", base.size, (0, 0, 0, 0))
-    gdraw = ImageDraw.Draw(glow)
-    gdraw.rounded_rectangle(rect, radius=radius, fill=(*accent, 75))
-    glow = glow.filter(ImageFilter.GaussianBlur(36))
-    base.alpha_composite(glow)
+    def paint(gdraw: ImageDraw.ImageDraw, dx: int, dy: int) -> None:
+        gdraw.rounded_rectangle((x0 + dx, y0 + dy, x1 + dx, y1 + dy), radius=radius, fill=(*accent, 75))
+
+    draw_glow(base, rect, 36, paint)
 
     draw.rounded_rectangle(rect, radius=radius, fill=(*COLORS["card"], 235), outline=(*accent, 200), width=3)
     draw.rounded_rectangle((x0 + 8, y0 + 8, x1 - 8, y1 - 8), radius=radius - 6, outline=(*accent, 70), width=1)
@@ -395,11 +484,12 @@ def draw_arrow(
     control = (mx + nx * length * curve, my + ny * length * curve)
     points = bezier_points(start, control, end, steps=38)
 
-    glow = Image.new("RGBA", base.size, (0, 0, 0, 0))
-    gdraw = ImageDraw.Draw(glow)
-    gdraw.line(points, fill=(*color, 70), width=10, joint="curve")
-    glow = glow.filter(ImageFilter.GaussianBlur(6))
-    base.alpha_composite(glow)
+    def paint(gdraw: ImageDraw.ImageDraw, dx: int, dy: int) -> None:
+        gdraw.line([(x + dx, y + dy) for x, y in points], fill=(*color, 70), width=10, joint="curve")
+
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+    draw_glow(base, (min(xs) - 10, min(ys) - 10, max(xs) + 10, max(ys) + 10), 6, paint)
 
     draw = ImageDraw.Draw(base)
     draw.line(points, fill=(*color, 210), width=4, joint="curve")
@@ -428,8 +518,7 @@ def draw_arrow(
 
 
 def render_architecture() -> Image.Image:
-    base = Image.new("RGBA", (WIDTH, HEIGHT), (5, 8, 10, 255))
-    draw_background(ImageDraw.Draw(base), base)
+    base = load_background()
     draw_title(ImageDraw.Draw(base), "Architecture Overview — Media Stack GA (Dec 20, 2025)", base)
 
     draw_zone(base, (90, 170, 2810, 520), "EDGE & IDENTITY", COLORS["zone_edge"])
@@ -474,8 +563,7 @@ def render_architecture() -> Image.Image:
 
 
 def render_security() -> Image.Image:
-    base = Image.new("RGBA", (WIDTH, HEIGHT), (5, 8, 10, 255))
-    draw_background(ImageDraw.Draw(base), base)
+    base = load_background()
     draw_title(ImageDraw.Draw(base), "Security Controls Map — Defense in Depth", base)
 
     draw_zone(base, (140, 190, 2776, 520), "PERIMETER CONTROLS", COLORS["zone_edge"])
@@ -510,8 +598,7 @@ def render_security() -> Image.Image:
 
 
 def render_access_modes() -> Image.Image:
-    base = Image.new("RGBA", (WIDTH, HEIGHT), (5, 8, 10, 255))
-    draw_background(ImageDraw.Draw(base), base)
+    base = load_background()
     draw_title(ImageDraw.Draw(base), "Access Modes — LAN vs Cloudflare (Dec 2025)", base)
 
     lan_zone = (120, 260, 1420, 1240)
@@ -553,20 +640,48 @@ def render_access_modes() -> Image.Image:
     return base.convert("RGB")
 
 
-def main() -> None:
-    OUT_DIR.mkdir(parents=True, exist_ok=True)
-    architecture = render_architecture()
-    security = render_security()
-    access_modes = render_access_modes()
+DIAGRAMS: dict[str, Callable[[], Image.Image]] = {
+    "architecture_overview": render_architecture,
+    "security_controls": render_security,
+    "access_modes": render_access_modes,
+}
 
-    architecture.save(OUT_DIR / "architecture_overview.png")
-    architecture.save(OUT_DIR / "architecture_overview.jpg", quality=92)
 
-    security.save(OUT_DIR / "security_controls.png")
-    security.save(OUT_DIR / "security_controls.jpg", quality=92)
+def save_diagram(name: str) -> str:
+    image = DIAGRAMS[name]()
+    # Pillow's encoders release the GIL, so the PNG and JPEG are written side by side.
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        outputs = [
+            pool.submit(image.save, OUT_DIR / f"{name}.png"),
+            pool.submit(image.save, OUT_DIR / f"{name}.jpg", quality=92),
+        ]
+        for output in outputs:
+            output.result()
+    return name
+
 
-    access_modes.save(OUT_DIR / "access_modes.png")
-    access_modes.save(OUT_DIR / "access_modes.jpg", quality=92)
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Render the architecture diagrams into docs/images.")
+    parser.add_argument("--jobs", type=int, default=None, help="Diagrams rendered in parallel (default: CPU count)")
+    args = parser.parse_args()
+
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    # Build or load the shared background before fanning out: forked workers
+    # inherit it and spawned ones read the disk cache instead of racing to build it.
+    load_background()
+    workers = max(1, min(args.jobs or os.cpu_count() or 1, len(DIAGRAMS)))
+    if workers == 1:
+        for name in DIAGRAMS:
+            save_diagram(name)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Each diagram is rendered and written by exactly one worker, so the files
+    # are the same bytes whatever --jobs is.
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for _ in pool.map(save_diagram, DIAGRAMS):
+            pass
 
 
 if __name__ == "__main__":
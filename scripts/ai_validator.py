@@ -1,69 +1,1637 @@
 #!/usr/bin/env python3
+import argparse
+import functools
+import hashlib
+import json
 import os
 import re
+import select
+import signal
+import socket
+import struct
 import sys
+import threading
+import time
+from collections import Counter, namedtuple
 
-def check_env_security():
-    print("🤖 AI Config Validator running...")
+try:
+    import yaml
+    YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    YAML_ERRORS = (yaml.YAMLError,)
+except ImportError:  # Only the compose checks need it, and a cached model doesn't
+    yaml = None
+    YAML_ERRORS = ()
+
+ENV_FILE = ".env"
+
+# Each stack is a base file plus the override files compose merges into it
+COMPOSE_STACKS = [
+    ("media", ["docker-compose.yml"]),
+    ("wizard", ["docker-compose.wizard.yml", "docker-compose.wizard.override.yml"]),
+    ("wizard-secure", ["docker-compose.wizard.secure.yml"]),
+]
+COMPOSE_CACHE = os.path.join("data", "ai_validator", "compose-model.json")
+MODEL_VERSION = 2 # Bump when the cached model's shape changes
+SERVICE_FIELDS = ("image", "build", "container_name", "network_mode", "depends_on", "networks", "ports", "expose",
+                  "volumes", "environment", "labels", "profiles", "healthcheck", "limits", "devices", "gpu", "tmpfs")
+LIST_FIELDS = {"networks", "ports", "expose", "volumes", "profiles", "devices", "tmpfs"}
+MAP_FIELDS = {"depends_on", "environment", "labels", "limits"}
+SPEC_PARTS = re.compile(r"(?:\$\{[^}]*\}|\[[^\]]*\]|[^:])+")
+WILDCARD_IPS = {"", "0.0.0.0", "::"}
+
+# Services the performance lints care about, matched by service name or image name
+MEDIA_SERVERS = ("plex", "jellyfin", "emby")
+TRANSCODERS = MEDIA_SERVERS + ("tdarr", "unmanic", "handbrake")
+ARR_APPS = ("sonarr", "radarr", "lidarr", "readarr", "whisparr")
+DOWNLOAD_CLIENTS = ("qbittorrent", "transmission", "deluge", "sabnzbd", "nzbget", "rtorrent")
+HEAVY_SERVICES = TRANSCODERS + DOWNLOAD_CLIENTS + ("photoprism", "immich", "postgres")
+RAM_FILESYSTEMS = {"tmpfs", "ramfs"}
+NETWORK_FILESYSTEMS = {"nfs", "nfs4", "cifs", "smb3", "fuse.sshfs", "fuse.rclone", "9p"}
+MOUNTINFO_ESCAPE = re.compile(r"\\([0-7]{3})")
+
+CATALOG_DIR = "apps"
+APP_FILES = ("metadata.json", "compose.yml")
+REGISTRY_FILES = [
+    os.path.join("control-server", "data", "apps-registry.json"),
+    os.path.join("docs-site", "src", "data", "apps-registry.json"),
+    os.path.join("apps", "registry.json"),
+]
+CATALOG_CACHE = os.path.join("data", "ai_validator", "catalog-cache.json")
+CATALOG_VERSION = 1 # Bump when validate_app's checks or result shape change
+CATALOG_MIN_BATCH = 32 # Apps per worker below which a process pool costs more than it saves
+# metadata.json field -> (type, required)
+METADATA_SCHEMA = {
+    "id": (str, True),
+    "name": (str, True),
+    "description": (str, True),
+    "category": (str, True),
+    "port": (int, True),
+    "icon": (str, False),
+    "docs": (str, False),
+}
+APP_ID = re.compile(r"[a-z0-9][a-z0-9-]*")
+
+WATCH_DEBOUNCE = 0.02 # Quiet time that ends a burst of save events
+WATCH_POLL_INTERVAL = 0.5
+WATCH_EVERYTHING = "*"
+SERVE_SOCKET = os.path.join("data", "ai_validator", "validator.sock")
+
+# Values that mean "nobody filled this in yet"
+PLACEHOLDERS = {"changeme", "changeme_random_string", "change_me", "change_me_token", "your-secret-token-here", "replace_me"}
+PLACEHOLDER_HINT = re.compile(r"change_?me|replace_?me|your-.*-here", re.IGNORECASE)
+
+Rule = namedtuple("Rule", "name severity keys key_pattern check message")
+
+def placeholder(value):
+    return value.lower() in PLACEHOLDERS or PLACEHOLDER_HINT.search(value) is not None
+
+def rule(name, severity, message, keys=(), key_pattern=None, equals=None, matches=None, expect=None,
+         min_length=None, is_placeholder=False, required=False, when_set=True):
+    # Builds a Rule whose check(value) returns True when the value is a problem
+    checks = []
+    if required:
+        checks.append(lambda value: not value)
+    if equals is not None:
+        bad = {v.lower() for v in equals}
+        checks.append(lambda value: value.lower() in bad)
+    if matches is not None:
+        bad_regex = re.compile(matches, re.IGNORECASE)
+        checks.append(lambda value: bad_regex.search(value) is not None)
+    if expect is not None:
+        good_regex = re.compile(expect)
+        checks.append(lambda value: good_regex.fullmatch(value) is None)
+    if min_length is not None:
+        checks.append(lambda value: len(value) < min_length)
+    if is_placeholder:
+        checks.append(placeholder)
+
+    def check(value):
+        if when_set and not required and not value:
+            return False
+        return any(test(value) for test in checks)
+
+    return Rule(name, severity, tuple(keys), re.compile(key_pattern) if key_pattern else None, check, message)
+
+AUTHELIA_SECRETS = [
+    "AUTHELIA_IDENTITY_VALIDATION_RESET_PASSWORD_JWT_SECRET",
+    "AUTHELIA_SESSION_SECRET",
+    "AUTHELIA_STORAGE_ENCRYPTION_KEY",
+]
+
+# Keyed rules run for their keys only, in order, stopping at the first problem;
+# key_pattern rules run for every key they match that no keyed rule flagged
+ENV_RULES = [
+    rule("required", "missing", "Missing required key: {key}", keys=["DOMAIN", "TIMEZONE", "PUID", "PGID"], required=True),
+    rule("domain-placeholder", "critical", "DOMAIN is still set to {value}", keys=["DOMAIN"], equals=["example.com", "localhost.localdomain"]),
+    rule("domain-format", "warning", "DOMAIN '{value}' doesn't look like a hostname", keys=["DOMAIN"],
+         expect=r"(?:[A-Za-z0-9](?:[A-Za-z0-9-]*[A-Za-z0-9])?\.)*[A-Za-z0-9](?:[A-Za-z0-9-]*[A-Za-z0-9])?"),
+    rule("tunnel-token-placeholder", "critical", "Cloudflare tunnel token is still a placeholder",
+         keys=["CLOUDFLARE_TUNNEL_TOKEN"], is_placeholder=True),
+    rule("redis-password-placeholder", "critical", "REDIS_PASSWORD is still '{value}'", keys=["REDIS_PASSWORD"], is_placeholder=True),
+    rule("photoprism-password-placeholder", "critical", "PHOTOPRISM_ADMIN_PASSWORD is still '{value}'",
+         keys=["PHOTOPRISM_ADMIN_PASSWORD"], is_placeholder=True),
+    rule("authelia-secret-placeholder", "critical", "Authelia secret {key} is still a placeholder", keys=AUTHELIA_SECRETS, is_placeholder=True),
+    rule("authelia-secret-length", "warning", "Authelia secret {key} is shorter than 32 characters", keys=AUTHELIA_SECRETS, min_length=32),
+    rule("control-token-placeholder", "critical", "CONTROL_SERVER_TOKEN is still a placeholder", keys=["CONTROL_SERVER_TOKEN"], is_placeholder=True),
+    rule("control-token-length", "warning", "CONTROL_SERVER_TOKEN is shorter than 24 characters", keys=["CONTROL_SERVER_TOKEN"], min_length=24),
+    rule("control-host-exposed", "warning", "CONTROL_SERVER_HOST={value} exposes the wizard API; set CONTROL_SERVER_TOKEN too",
+         keys=["CONTROL_SERVER_HOST"], equals=["0.0.0.0", "::"]),
+    rule("puid-numeric", "error", "{key} must be a numeric id, got '{value}'", keys=["PUID", "PGID"], expect=r"\d+"),
+    rule("puid-root", "warning", "{key}=0 runs the containers as root", keys=["PUID", "PGID"], equals=["0"]),
+    rule("timezone-format", "warning", "TIMEZONE '{value}' isn't an IANA zone like Europe/Berlin",
+         keys=["TIMEZONE"], expect=r"UTC|GMT|[A-Za-z_]+(?:/[A-Za-z0-9_+-]+)+"),
+    rule("wireguard-addresses", "error", "WIREGUARD_ADDRESSES '{value}' should be CIDR addresses like 10.13.13.2/32",
+         keys=["WIREGUARD_ADDRESSES"], expect=r"[0-9a-fA-F:.]+/\d{1,3}(?:\s*,\s*[0-9a-fA-F:.]+/\d{1,3})*"),
+    rule("wireguard-port", "error", "WIREGUARD_ENDPOINT_PORT '{value}' isn't a port number", keys=["WIREGUARD_ENDPOINT_PORT"], expect=r"\d{1,5}"),
+    rule("path-unresolved", "error", "{key} still contains an unresolved variable: {value}", key_pattern=r".*(?:_PATH|_ROOT)$",
+         matches=r"\$\{?[A-Za-z_]"),
+    rule("secret-placeholder", "warning", "{key} is still a placeholder", key_pattern=r".*(?:PASSWORD|SECRET|TOKEN|_KEY)$", is_placeholder=True),
+]
+
+SEVERITY_PREFIX = {
+    "critical": "⚠️  CRITICAL: ",
+    "error": "❌ ",
+    "missing": "❌ ",
+    "warning": "⚠️  ",
+    "perf": "🐢 ",
+}
+
+EnvFile = namedtuple("EnvFile", "values lines errors")
+
+ENV_LINE = re.compile(r"\s*(?:export\s+)?([A-Za-z_][A-Za-z0-9_.-]*)\s*=\s*(.*)")
+# Escapes and ${VAR} / ${VAR:-default} / $VAR references inside a value
+INTERPOLATION = re.compile(r"\\(.)|\$\{([A-Za-z_][A-Za-z0-9_]*)(?:(:?[-?])([^}]*))?\}|\$([A-Za-z_][A-Za-z0-9_]*)")
+ESCAPES = {"n": "\n", "t": "\t", "r": "\r"}
+
+def interpolate(value, lookup, escapes=True):
+    def replace(match):
+        escaped, name, op, default, bare = match.groups()
+        if escaped is not None:
+            if not escapes:
+                return match.group(0)
+            return ESCAPES.get(escaped, escaped)
+        name = name or bare
+        current = lookup(name)
+        if op and op.endswith("-") and (current is None or (op == ":-" and current == "")):
+            return interpolate(default, lookup, escapes)
+        return current or ""
+    return INTERPOLATION.sub(replace, value)
+
+def closing_quote(body, quote):
+    if quote == "'":
+        return body.find("'")
+    idx = 0
+    while idx < len(body):
+        char = body[idx]
+        if char == "\\":
+            idx += 2
+            continue
+        if char == quote:
+            return idx
+        idx += 1
+    return -1
+
+def parse_dotenv(text, environ=None):
+    """Parses .env text the way docker compose reads it.
+
+    Handles comments, blank lines, `export KEY=...`, single quotes (literal),
+    double quotes (escapes, may span lines) and ${VAR}/${VAR:-default}/$VAR
+    interpolation from earlier keys, then the environment.
+    """
+    environ = os.environ if environ is None else environ
+    values = {}
+    lines = {}
+    errors = []
+
+    def lookup(name):
+        return values[name] if name in values else environ.get(name)
+
+    raw_lines = text.splitlines()
+    idx = 0
+    while idx < len(raw_lines):
+        lineno = idx + 1
+        raw = raw_lines[idx]
+        idx += 1
+        stripped = raw.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        match = ENV_LINE.fullmatch(raw)
+        if not match:
+            errors.append((lineno, f"can't parse line: {stripped}"))
+            continue
+        key, rest = match.groups()
+        if rest[:1] in ("'", '"'):
+            quote, body = rest[0], rest[1:]
+            end = closing_quote(body, quote)
+            while end == -1 and idx < len(raw_lines) and quote == '"':
+                body += "\n" + raw_lines[idx]
+                idx += 1
+                end = closing_quote(body, quote)
+            if end == -1:
+                errors.append((lineno, f"unterminated quote in {key}"))
+                end = len(body)
+            value = body[:end] if quote == "'" else interpolate(body[:end], lookup)
+        else:
+            value = interpolate(re.split(r"\s+#", rest, 1)[0].strip(), lookup, escapes=False)
+        values[key] = value
+        lines[key] = lineno
+    return EnvFile(values, lines, errors)
+
+def load_env(path=ENV_FILE):
+    with open(path, "r") as f:
+        return parse_dotenv(f.read())
+
+class RuleSet:
+    """Env rules compiled once and checked in a single pass over the parsed keys.
+
+    Keyed rules are looked up by key, so the cost is O(keys) plus the few
+    key_pattern rules; time spent in each rule is accumulated in `timings`
+    (nanoseconds).
+    """
+
+    def __init__(self, rules=ENV_RULES):
+        self.rules = list(rules)
+        self.by_key = {}
+        self.required = []
+        self.patterned = []
+        for entry in self.rules:
+            if entry.severity == "missing":
+                self.required.append(entry)
+            elif entry.key_pattern is not None:
+                self.patterned.append(entry)
+            for key in entry.keys:
+                if entry.severity != "missing":
+                    self.by_key.setdefault(key, []).append(entry)
+        self.timings = Counter()
+        self.calls = Counter()
+
+    def _run(self, entry, key, value):
+        started = time.perf_counter_ns()
+        bad = entry.check(value)
+        self.timings[entry.name] += time.perf_counter_ns() - started
+        self.calls[entry.name] += 1
+        return bad
+
+    def check(self, env):
+        # Returns [(rule, key, value)] for every problem found
+        found = []
+        values = env.values
+        for entry in self.required:
+            for key in entry.keys:
+                if self._run(entry, key, values.get(key, "")):
+                    found.append((entry, key, None))
+        for key, value in values.items():
+            # Rules are ordered most important first; one problem per key is enough
+            for entry in self.by_key.get(key, ()):
+                if self._run(entry, key, value):
+                    found.append((entry, key, value))
+                    break
+            else:
+                self._check_patterned(key, value, found)
+        return found
+
+    def _check_patterned(self, key, value, found):
+        for entry in self.patterned:
+            if entry.key_pattern.fullmatch(key) and self._run(entry, key, value):
+                found.append((entry, key, value))
+                return
+
+def format_issue(entry, key, value, env=None, path=ENV_FILE):
+    message = entry.message.format(key=key, value=value)
+    line = env.lines.get(key) if env is not None else None
+    where = f" ({path} line {line})" if line else ""
+    return f"{SEVERITY_PREFIX[entry.severity]}{message}{where}"
+
+def print_timings(ruleset):
+    total = sum(ruleset.timings.values())
+    print(f"\n⏱️  Rule timings ({len(ruleset.timings)} rules, {total / 1000:.1f} µs total):")
+    for name, spent in ruleset.timings.most_common():
+        print(f"   {name:<34} {spent / 1000:>8.1f} µs over {ruleset.calls[name]} checks")
+
+def check_env_security(path=ENV_FILE, ruleset=None, env=None):
+    if env is None and not os.path.exists(path):
+        return [f"❌ {path} file missing"]
+
+    env = env or load_env(path)
+    ruleset = ruleset or RuleSet()
+    issues = [f"❌ {path} line {lineno}: {error}" for lineno, error in env.errors]
+    issues.extend(format_issue(entry, key, value, env, path) for entry, key, value in ruleset.check(env))
+    return issues
+
+def parse_compose_file(path):
+    with open(path, "r") as f:
+        return parse_compose_text(f.read())
+
+def parse_compose_text(text):
+    data = yaml.load(text, Loader=YAML_LOADER) or {}
+    if not isinstance(data, dict):
+        raise ValueError("top level isn't a mapping")
+    return data
+
+def split_spec(value):
+    # "host_ip:published:target" with ${VAR:-default} and [ipv6] kept whole
+    return SPEC_PARTS.findall(str(value))
+
+def parse_port(entry):
+    if isinstance(entry, dict):
+        return {"host_ip": str(entry.get("host_ip", "")), "published": str(entry.get("published", "")),
+                "target": str(entry.get("target", "")), "protocol": str(entry.get("protocol", "tcp"))}
+    spec, _, protocol = str(entry).partition("/")
+    parts = split_spec(spec)
+    host_ip, published = "", ""
+    if len(parts) >= 3:
+        host_ip, published = parts[-3].strip("[]"), parts[-2]
+    elif len(parts) == 2:
+        published = parts[0]
+    return {"host_ip": host_ip, "published": published, "target": parts[-1] if parts else "", "protocol": protocol or "tcp"}
+
+def parse_volume(entry):
+    if isinstance(entry, dict):
+        return {"type": str(entry.get("type", "volume")), "source": str(entry.get("source", "")),
+                "target": str(entry.get("target", "")), "read_only": bool(entry.get("read_only"))}
+    parts = split_spec(entry)
+    if len(parts) == 1:
+        return {"type": "volume", "source": "", "target": parts[0], "read_only": False}
+    source, target = parts[0], parts[1]
+    mode = parts[2] if len(parts) > 2 else ""
+    kind = "bind" if source[:1] in ("/", ".", "~", "$") else "volume"
+    return {"type": kind, "source": source, "target": target, "read_only": "ro" in mode.split(",")}
+
+def as_mapping(value):
+    # environment and labels come either as KEY=value lists or as mappings
+    if isinstance(value, dict):
+        return {str(k): "" if v is None else str(v) for k, v in value.items()}
+    mapping = {}
+    for item in value or ():
+        key, _, val = str(item).partition("=")
+        mapping[key] = val
+    return mapping
+
+def as_depends_on(value):
+    if isinstance(value, dict):
+        return {str(k): (v or {}).get("condition", "service_started") if isinstance(v, dict) else "service_started"
+                for k, v in value.items()}
+    return {str(name): "service_started" for name in value or ()}
+
+def as_list(value):
+    if isinstance(value, dict):
+        return [str(k) for k in value]
+    if isinstance(value, (list, tuple)):
+        return [str(v) for v in value]
+    return [str(value)] if value else []
+
+def as_healthcheck(value):
+    if not isinstance(value, dict):
+        return None
+    test = value.get("test")
+    return "disabled" if value.get("disable") or test in ("NONE", ["NONE"]) else "defined"
+
+def deploy_resources(raw, section):
+    deploy = raw.get("deploy") if isinstance(raw.get("deploy"), dict) else {}
+    resources = deploy.get("resources") if isinstance(deploy.get("resources"), dict) else {}
+    return resources.get(section) if isinstance(resources.get(section), dict) else {}
+
+def as_limits(raw):
+    # deploy.resources.limits, plus the older service-level mem_limit/cpus
+    limits = dict(deploy_resources(raw, "limits"))
+    if raw.get("mem_limit"):
+        limits.setdefault("memory", raw["mem_limit"])
+    if raw.get("cpus"):
+        limits.setdefault("cpus", raw["cpus"])
+    return {key: str(value) for key, value in limits.items() if key in ("cpus", "memory")}
+
+def has_gpu(raw):
+    if raw.get("runtime") == "nvidia" or raw.get("gpus"):
+        return True
+    devices = deploy_resources(raw, "reservations").get("devices") or ()
+    return any(isinstance(d, dict) and ("gpu" in (d.get("capabilities") or ()) or d.get("driver") == "nvidia") for d in devices)
+
+def normalize_service(raw, path):
+    raw = raw or {}
+    service = {
+        "file": path,
+        "image": raw.get("image"),
+        "build": "build" in raw,
+        "container_name": raw.get("container_name"),
+        "network_mode": raw.get("network_mode"),
+        "depends_on": as_depends_on(raw.get("depends_on")),
+        "networks": as_list(raw.get("networks")),
+        "ports": [parse_port(p) for p in raw.get("ports") or ()],
+        "expose": [str(p) for p in raw.get("expose") or ()],
+        "volumes": [parse_volume(v) for v in raw.get("volumes") or ()],
+        "environment": as_mapping(raw.get("environment")),
+        "labels": as_mapping(raw.get("labels")),
+        "profiles": as_list(raw.get("profiles")),
+        "healthcheck": as_healthcheck(raw.get("healthcheck")),
+        "limits": as_limits(raw),
+        "devices": [d if isinstance(d, str) else f"{d.get('source', '')}:{d.get('target', '')}"
+                    for d in raw.get("devices") or () if isinstance(d, (str, dict))],
+        "gpu": has_gpu(raw),
+        "tmpfs": [entry.partition(":")[0] for entry in as_list(raw.get("tmpfs"))],
+    }
+    # Override files only carry the keys they change
+    return {field: value for field, value in service.items() if value or field == "file" or field in raw}
+
+def merge_service(base, override):
+    # Compose merge rules: mappings merge, volumes replace by target, other lists append, scalars win
+    merged = dict(base)
+    for field, value in override.items():
+        current = merged.get(field)
+        if isinstance(value, dict) and isinstance(current, dict):
+            merged[field] = {**current, **value}
+        elif field == "volumes" and current:
+            targets = {volume["target"] for volume in value}
+            merged[field] = [volume for volume in current if volume["target"] not in targets] + value
+        elif isinstance(value, list) and current:
+            merged[field] = current + [item for item in value if item not in current]
+        elif field != "file":
+            merged[field] = value
+    return merged
+
+def build_stack(files):
+    services, networks, volumes = {}, [], []
+    for path in files:
+        data = parse_compose_file(path)
+        for name, raw in (data.get("services") or {}).items():
+            service = normalize_service(raw, path)
+            services[name] = merge_service(services[name], service) if name in services else service
+        networks += [n for n in as_list(data.get("networks")) if n not in networks]
+        volumes += [v for v in as_list(data.get("volumes")) if v not in volumes]
+    for service in services.values():
+        for field in SERVICE_FIELDS:
+            service.setdefault(field, [] if field in LIST_FIELDS else {} if field in MAP_FIELDS else None)
+    return {"files": list(files), "services": services, "networks": networks, "volumes": volumes, "error": None}
+
+def compose_key(stacks):
+    digest = hashlib.blake2b(f"compose-model/{MODEL_VERSION}".encode(), digest_size=16)
+    for name, files in stacks:
+        for path in files:
+            digest.update(f"\0{name}\0{path}\0".encode())
+            try:
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+            except OSError:
+                digest.update(b"\0missing")
+    return digest.hexdigest()
+
+class ComposeModel:
+    """Service graph of each compose stack, cached on disk by content hash.
+
+    A stack is a base compose file plus the override files compose merges into
+    it. The model keeps what the graph checks need (network_mode, depends_on,
+    networks, volumes, ports, ...) as plain JSON, so a run whose compose files
+    haven't changed loads it without touching YAML at all.
+    """
+
+    def __init__(self, stacks, key, cached=False):
+        self.stacks = stacks
+        self.key = key
+        self.cached = cached
+
+    @classmethod
+    def load(cls, stacks=COMPOSE_STACKS, cache_path=COMPOSE_CACHE):
+        present = [(name, [path for path in files if os.path.exists(path)]) for name, files in stacks]
+        present = [(name, files) for name, files in present if files]
+        key = compose_key(present)
+        if cache_path:
+            try:
+                with open(cache_path, "r") as f:
+                    cached = json.load(f)
+                if cached.get("key") == key:
+                    return cls(cached["stacks"], key, cached=True)
+            except (OSError, ValueError, KeyError):
+                pass
+        if yaml is None:
+            raise RuntimeError("PyYAML isn't installed (pip install pyyaml)")
+
+        built = {}
+        for name, files in present:
+            try:
+                built[name] = build_stack(files)
+            except (OSError, ValueError, AttributeError, *YAML_ERRORS) as e:
+                built[name] = {"files": files, "services": {}, "networks": [], "volumes": [], "error": " ".join(str(e).split())}
+        model = cls(built, key)
+        if cache_path:
+            model.save(cache_path)
+        return model
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": MODEL_VERSION, "key": self.key, "stacks": self.stacks}, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def service_count(self):
+        return sum(len(stack["services"]) for stack in self.stacks.values())
+
+def network_provider(service):
+    mode = service.get("network_mode") or ""
+    return mode.partition(":")[2] if mode.startswith("service:") else None
+
+def dependency_cycles(services):
+    # Iterative DFS; network_mode: service:X is an implicit dependency on X
+    edges = {name: list(svc["depends_on"]) + [p for p in [network_provider(svc)] if p] for name, svc in services.items()}
+    state, cycles = {}, []
+    for root in edges:
+        if root in state:
+            continue
+        path, stack = [], [(root, iter(edges[root]))]
+        state[root] = "open"
+        path.append(root)
+        while stack:
+            node, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                state[node] = "done"
+                stack.pop()
+                path.pop()
+            elif state.get(child) == "open":
+                cycles.append(path[path.index(child):] + [child])
+            elif child not in state and child in edges:
+                state[child] = "open"
+                path.append(child)
+                stack.append((child, iter(edges[child])))
+    return cycles
+
+def host_ports(service, lookup):
+    # Yields (host_ip, port, protocol) for every published host port that resolves to a number
+    for port in service["ports"]:
+        published = interpolate(port["published"], lookup, escapes=False)
+        low, _, high = published.partition("-")
+        if not low.isdigit() or (high and not high.isdigit()):
+            continue
+        for number in range(int(low), int(high or low) + 1):
+            yield interpolate(port["host_ip"], lookup, escapes=False), number, port["protocol"]
+
+def ports_clash(ip, other_ip):
+    return ip == other_ip or ip in WILDCARD_IPS or other_ip in WILDCARD_IPS
+
+def check_routed_services(stack_name, services):
+    issues = []
+    for name, service in services.items():
+        provider = network_provider(service)
+        if provider is None:
+            continue
+        if provider not in services:
+            issues.append(f"❌ {name} uses network_mode: service:{provider}, but {stack_name} has no service {provider}")
+            continue
+        if service["ports"] or service["expose"]:
+            ports = [p["published"] + ":" + p["target"] if p["published"] else p["target"] for p in service["ports"]]
+            issues.append(f"❌ {name} routes through {provider} but publishes {', '.join(ports + service['expose'])} itself; "
+                          f"publish them on {provider}")
+        if service["networks"]:
+            issues.append(f"❌ {name} sets both network_mode: service:{provider} and networks; compose rejects that")
+        published = {p["target"].partition("-")[0] for p in services[provider]["ports"]}
+        for key, value in service["environment"].items():
+            if key.endswith("PORT") and value.isdigit() and value not in published:
+                issues.append(f"⚠️  {name} listens on {key}={value} but {provider} doesn't publish it; "
+                              f"the port is unreachable from the host")
+        # Routed services have no network of their own, so their name doesn't resolve
+        needle = f"//{name}:"
+        for other, other_service in services.items():
+            if other != name and network_provider(other_service) == provider:
+                continue
+            for key, value in list(other_service["environment"].items()) + list(other_service["labels"].items()):
+                if needle in value:
+                    issues.append(f"⚠️  {other}'s {key}={value.strip()} points at {name}, which shares {provider}'s "
+                                  f"network; use {value.replace(needle, f'//{provider}:').strip()}")
+    return issues
+
+def check_references(stack_name, stack):
+    issues = []
+    services = stack["services"]
+    for name, service in services.items():
+        for dependency in service["depends_on"]:
+            if dependency not in services:
+                issues.append(f"❌ {name} depends on {dependency}, which {stack_name} doesn't define")
+        for network in service["networks"]:
+            if network not in stack["networks"] and network != "default":
+                issues.append(f"❌ {name} joins network {network}, which {stack_name} doesn't declare")
+        for volume in service["volumes"]:
+            if volume["type"] == "volume" and volume["source"] and volume["source"] not in stack["volumes"]:
+                issues.append(f"❌ {name} mounts named volume {volume['source']}, which {stack_name} doesn't declare")
+    for cycle in dependency_cycles(services):
+        issues.append(f"❌ Dependency cycle in {stack_name}: {' → '.join(cycle)}")
+    return issues
+
+def check_host_ports(model, lookup):
+    # Stacks that share a container_name are alternatives and never run side by side
+    claimed = []
+    issues = []
+    for stack_name, stack in model.stacks.items():
+        containers = {svc["container_name"] for svc in stack["services"].values() if svc["container_name"]}
+        for name, service in stack["services"].items():
+            for ip, number, protocol in host_ports(service, lookup):
+                for other_stack, other_containers, other, other_ip, other_number, other_protocol in claimed:
+                    if (other_number, other_protocol) != (number, protocol) or not ports_clash(ip, other_ip):
+                        continue
+                    if other_stack != stack_name and containers & other_containers:
+                        continue
+                    if (other_stack, other) == (stack_name, name):
+                        continue
+                    where = stack_name if other_stack == stack_name else f"{other_stack} and {stack_name}"
+                    issues.append(f"❌ Host port {number}/{protocol} is published by both {other} and {name} ({where})")
+                claimed.append((stack_name, containers, name, ip, number, protocol))
+    return issues
+
+@functools.lru_cache(maxsize=None)
+def host_mounts():
+    # (mount point, fstype, major:minor) from /proc/self/mountinfo, deepest first; empty off Linux
+    try:
+        with open("/proc/self/mountinfo", "r") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return ()
+    mounts = []
+    for line in reversed(lines): # Later mounts shadow earlier ones at the same point
+        fields = line.split()
+        if "-" not in fields:
+            continue
+        point = MOUNTINFO_ESCAPE.sub(lambda match: chr(int(match.group(1), 8)), fields[4])
+        mounts.append((point, fields[fields.index("-") + 1], fields[2]))
+    return tuple(sorted(mounts, key=lambda mount: -len(mount[0])))
+
+def probe_mount(path):
+    # The host mount holding path, or None when path doesn't exist here (e.g. inside the wizard container)
+    if path is None or not os.path.exists(path):
+        return None
+    real = os.path.realpath(path)
+    for mount in host_mounts():
+        if real == mount[0] or real.startswith(mount[0].rstrip("/") + "/"):
+            return mount
+    return None
+
+@functools.lru_cache(maxsize=None)
+def is_rotational(device):
+    # Partitions keep queue/ on their parent disk; None when sysfs doesn't say
+    for path in (f"/sys/dev/block/{device}/queue/rotational", f"/sys/dev/block/{device}/../queue/rotational"):
+        try:
+            with open(path, "r") as f:
+                return f.read().strip() == "1"
+        except OSError:
+            continue
+    return None
+
+def host_path(source, lookup):
+    # Host side of a bind mount with ${VARS} resolved, or None if a variable isn't set
+    missing = []
+
+    def tracked(name):
+        value = lookup(name)
+        if value is None:
+            missing.append(name)
+        return value
+
+    path = interpolate(source, tracked, escapes=False)
+    if missing or not path:
+        return None
+    return os.path.abspath(os.path.expanduser(path))
+
+def is_kind(name, service, kinds):
+    image = (service.get("image") or "").rsplit("/", 1)[-1].partition(":")[0]
+    return any(kind == name or kind in image for kind in kinds)
+
+def covers(parent, child):
+    return child == parent or child.startswith(parent.rstrip("/") + "/")
+
+def download_volume(service):
+    return next((v for v in service["volumes"] if "download" in v["target"].lower()), None)
+
+def check_transcode(stack_name, services, lookup):
+    issues = []
+    for name, service in services.items():
+        if not is_kind(name, service, TRANSCODERS):
+            continue
+        if any("transcode" in target.lower() for target in service["tmpfs"]):
+            continue
+        volumes = [v for v in service["volumes"] if "transcode" in (v["source"] + v["target"]).lower()]
+        if any(v["type"] == "tmpfs" for v in volumes):
+            continue
+        if not volumes:
+            issues.append(f"🐢 {name} has no transcode mount, so transcodes are written next to its config; "
+                          f"mount TRANSCODE_PATH or a tmpfs")
+            continue
+        for volume in volumes:
+            mount = probe_mount(host_path(volume["source"], lookup)) if volume["type"] == "bind" else None
+            if mount is None or mount[1] in RAM_FILESYSTEMS:
+                continue
+            if mount[1] in NETWORK_FILESYSTEMS:
+                issues.append(f"🐢 {name} transcodes to {volume['source']} on {mount[1]} network storage ({mount[0]}); "
+                              f"use a tmpfs or a local SSD")
+            elif is_rotational(mount[2]):
+                issues.append(f"🐢 {name} transcodes to {volume['source']} on a spinning disk ({mount[0]}); "
+                              f"use a tmpfs or an SSD")
+    return issues
+
+def check_hwaccel(stack_name, services, lookup):
+    issues = []
+    for name, service in services.items():
+        if not is_kind(name, service, TRANSCODERS):
+            continue
+        if service["gpu"] or any("/dev/dri" in device or "nvidia" in device for device in service["devices"]):
+            continue
+        hint = "this host has /dev/dri; " if os.path.exists("/dev/dri") else ""
+        issues.append(f"🐢 {name} has no GPU mapped, so every transcode runs on the CPU; {hint}"
+                      f"add devices: [/dev/dri:/dev/dri] (Intel/AMD) or an NVIDIA device reservation")
+    return issues
+
+def check_hardlinks(stack_name, services, lookup):
+    # Hardlinks and atomic moves only work inside one mount, both in the container and on the host
+    issues = []
+    clients = {name: download_volume(svc) for name, svc in services.items() if is_kind(name, svc, DOWNLOAD_CLIENTS)}
+    for name, service in services.items():
+        if not is_kind(name, service, ARR_APPS):
+            continue
+        downloads = download_volume(service)
+        if downloads is None:
+            continue
+        library = [v for v in service["volumes"] if v["type"] == "bind" and v is not downloads
+                   and not covers("/config", v["target"]) and "docker.sock" not in v["source"]
+                   and not covers(v["target"], downloads["target"]) and not covers(downloads["target"], v["target"])]
+        if library:
+            targets = ", ".join(v["target"] for v in library)
+            issues.append(f"🐢 {name} mounts {downloads['target']} and {targets} separately, so imports copy instead of "
+                          f"hardlinking; mount one shared parent (e.g. ${{DATA_ROOT}}:/data) and use paths under it")
+        download_mount = probe_mount(host_path(downloads["source"], lookup))
+        for volume in library:
+            mount = probe_mount(host_path(volume["source"], lookup))
+            if download_mount and mount and mount[2] != download_mount[2]:
+                issues.append(f"🐢 {name}: {downloads['source']} and {volume['source']} are on different filesystems here "
+                              f"({download_mount[0]} vs {mount[0]}); imports will always copy")
+        for client, client_volume in clients.items():
+            if client_volume and client_volume["source"] == downloads["source"] and client_volume["target"] != downloads["target"]:
+                issues.append(f"🐢 {client} saves to {client_volume['target']} but {name} sees that folder as "
+                              f"{downloads['target']}; {name} can't import without a remote path mapping")
+    return issues
+
+def check_limits(stack_name, services, lookup):
+    unlimited = []
+    for name, service in services.items():
+        if not is_kind(name, service, HEAVY_SERVICES):
+            continue
+        absent = [key for key in ("cpus", "memory") if key not in service["limits"]]
+        if absent:
+            unlimited.append(name if len(absent) == 2 else f"{name} (no {absent[0]} limit)")
+    if not unlimited:
+        return []
+    return [f"🐢 {len(unlimited)} heavy services in {stack_name} have no CPU/memory limits, so one transcode or "
+            f"download burst can starve the rest: {', '.join(unlimited)}"]
+
+def check_healthchecks(stack_name, services, lookup):
+    issues = []
+    for name, service in services.items():
+        for dependency, condition in service["depends_on"].items():
+            if condition == "service_healthy" and services.get(dependency, {}).get("healthcheck") == "disabled":
+                issues.append(f"❌ {name} waits for {dependency} to be healthy, but {dependency} disables its healthcheck")
+    missing = sorted(name for name, service in services.items() if service["healthcheck"] is None)
+    if missing:
+        autoheal = any(is_kind(name, service, ("autoheal",)) for name, service in services.items())
+        why = "autoheal can't restart them when they hang" if autoheal else "compose can't tell a hung service from a healthy one"
+        issues.append(f"🐢 {len(missing)} services in {stack_name} define no healthcheck (unless their image does), "
+                      f"so {why}: {', '.join(missing)}")
+    return issues
+
+PERF_CHECKS = [
+    ("perf-transcode", check_transcode),
+    ("perf-hwaccel", check_hwaccel),
+    ("perf-hardlinks", check_hardlinks),
+    ("perf-limits", check_limits),
+    ("perf-healthchecks", check_healthchecks),
+]
+
+def check_compose_perf(model, env=None, ruleset=None):
+    lookup = env_lookup(env)
+    issues = []
+    for stack_name, stack in model.stacks.items():
+        if stack["error"]:
+            continue
+        for name, check in PERF_CHECKS:
+            started = time.perf_counter_ns()
+            issues.extend(check(stack_name, stack["services"], lookup))
+            if ruleset is not None:
+                ruleset.timings[name] += time.perf_counter_ns() - started
+                ruleset.calls[name] += 1
+    return issues
+
+def check_compose_graph(model, env=None):
+    lookup = env_lookup(env)
+    issues = []
+    for stack_name, stack in model.stacks.items():
+        if stack["error"]:
+            issues.append(f"❌ {stack_name}: can't parse {', '.join(stack['files'])}: {stack['error']}")
+            continue
+        issues.extend(check_references(stack_name, stack))
+        issues.extend(check_routed_services(stack_name, stack["services"]))
+    issues.extend(check_host_ports(model, lookup))
+    return issues
+
+def validate_app(app_dir, texts):
+    """Checks one app directory; runs in a worker process and must stay picklable.
+
+    `texts` maps each of APP_FILES to its contents (None when missing). The
+    result holds the app's (severity, message) issues plus what the
+    catalog-wide checks need.
+    """
     issues = []
-    
-    if not os.path.exists(".env"):
-        return ["❌ .env file missing"]
-
-    with open(".env", "r") as f:
-        content = f.read()
-
-    # Rule 1: obvious placeholders / unsafe defaults
-    if re.search(r'^DOMAIN=example\\.com\\s*$', content, re.MULTILINE):
-        issues.append("⚠️  CRITICAL: DOMAIN is still set to example.com")
-
-    if "CHANGE_ME_TOKEN" in content or re.search(r'^CLOUDFLARE_TUNNEL_TOKEN=changeme\\s*$', content, re.MULTILINE):
-        issues.append("⚠️  CRITICAL: Cloudflare tunnel token is still a placeholder")
-
-    if re.search(r'^REDIS_PASSWORD=changeme\\s*$', content, re.MULTILINE):
-        issues.append("⚠️  CRITICAL: REDIS_PASSWORD is still 'changeme'")
-    
-    # Rule 2: Weak / uninitialized secrets
-    weak_secret_patterns = [
-        r'^AUTHELIA_IDENTITY_VALIDATION_RESET_PASSWORD_JWT_SECRET=(changeme_random_string|changeme)\\s*$',
-        r'^AUTHELIA_SESSION_SECRET=(changeme_random_string|changeme)\\s*$',
-        r'^AUTHELIA_STORAGE_ENCRYPTION_KEY=(changeme_random_string|changeme)\\s*$',
-    ]
-    for pattern in weak_secret_patterns:
-        if re.search(pattern, content, re.MULTILINE):
-            issues.append("⚠️  CRITICAL: One or more Authelia secrets are still placeholders")
-
-    # Rule 3: Missing Keys
-    required_keys = ["DOMAIN", "TIMEZONE", "PUID", "PGID"]
-    for key in required_keys:
-        if f"{key}=" not in content:
-            issues.append(f"❌ Missing required key: {key}")
+    result = {"issues": issues, "id": None, "name": None, "category": None, "port": None, "services": {}, "containers": []}
+    metadata = {}
+    if texts["metadata.json"] is None:
+        issues.append(("error", "metadata.json missing"))
+    else:
+        try:
+            metadata = json.loads(texts["metadata.json"])
+        except ValueError as e:
+            issues.append(("error", f"metadata.json isn't valid JSON: {e}"))
+        if not isinstance(metadata, dict):
+            issues.append(("error", "metadata.json must be a JSON object"))
+            metadata = {}
+    for field, (kind, required) in METADATA_SCHEMA.items():
+        value = metadata.get(field)
+        if value is None:
+            if required and texts["metadata.json"] is not None:
+                issues.append(("error", f"metadata.json is missing {field}"))
+        elif not isinstance(value, kind) or isinstance(value, bool):
+            issues.append(("error", f"metadata.json {field} should be {kind.__name__}, got {type(value).__name__}"))
+        elif field in result:
+            result[field] = value
+    app_id = result["id"]
+    if app_id is not None and not APP_ID.fullmatch(app_id):
+        issues.append(("error", f"metadata.json id '{app_id}' isn't a lowercase slug"))
+    elif app_id is not None and app_id != os.path.basename(app_dir):
+        issues.append(("error", f"metadata.json id '{app_id}' doesn't match its directory name"))
+    port = result["port"]
+    if port is not None and not 0 < port < 65536:
+        issues.append(("error", f"metadata.json port {port} is out of range"))
+    docs = metadata.get("docs")
+    if isinstance(docs, str) and not docs.startswith(("https://", "http://")):
+        issues.append(("warning", f"metadata.json docs '{docs}' isn't an http(s) URL"))
+
+    if texts["compose.yml"] is None:
+        issues.append(("error", "compose.yml missing"))
+        return result
+    try:
+        services = parse_compose_text(texts["compose.yml"]).get("services") or {}
+        services = {name: normalize_service(raw, "compose.yml") for name, raw in services.items()}
+    except (ValueError, AttributeError, *YAML_ERRORS) as e:
+        issues.append(("error", f"compose.yml can't be parsed: {' '.join(str(e).split())}"))
+        return result
+    if not services:
+        issues.append(("error", "compose.yml defines no services"))
+        return result
+    result["services"] = {name: service.get("ports", []) for name, service in services.items()}
+    result["containers"] = [service["container_name"] for service in services.values() if service.get("container_name")]
+    if app_id is not None and app_id not in services:
+        issues.append(("warning", f"metadata.json id '{app_id}' matches no service in compose.yml ({', '.join(services)})"))
+    if port is not None:
+        service = services.get(app_id) or next(iter(services.values()))
+        targets = {p["target"].partition("-")[0] for p in service.get("ports", [])} | set(service.get("expose", []))
+        published = {p["published"] for p in service.get("ports", [])}
+        if str(port) not in targets | published:
+            issues.append(("error", f"metadata.json port {port} isn't published or exposed by compose.yml"))
+    for name, service in services.items():
+        if not service.get("image") and not service.get("build"):
+            issues.append(("error", f"compose.yml service {name} has neither image nor build"))
+    return result
+
+def validate_app_job(job):
+    app_dir, texts = job
+    return app_dir, validate_app(app_dir, texts)
+
+def read_app(app_dir):
+    texts = {}
+    digest = hashlib.blake2b(f"catalog/{CATALOG_VERSION}".encode(), digest_size=16)
+    for name in APP_FILES:
+        try:
+            with open(os.path.join(app_dir, name), "rb") as f:
+                data = f.read()
+        except OSError:
+            texts[name] = None
+            digest.update(f"\0{name}\0missing".encode())
+            continue
+        texts[name] = data.decode("utf-8", "replace")
+        digest.update(f"\0{name}\0".encode() + data)
+    return digest.hexdigest(), texts
 
+class CatalogCache:
+    """validate_app results per app directory, keyed by a hash of its files."""
+
+    def __init__(self, path=CATALOG_CACHE):
+        self.path = path
+        self.entries = {}
+        self.dirty = False
+        if not path:
+            return
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            if data.get("version") == CATALOG_VERSION:
+                self.entries = data.get("apps", {})
+        except (OSError, ValueError):
+            pass
+
+    def get(self, app_dir, key):
+        entry = self.entries.get(app_dir)
+        return entry["result"] if entry and entry.get("key") == key else None
+
+    def put(self, app_dir, key, result):
+        self.entries[app_dir] = {"key": key, "result": result}
+        self.dirty = True
+
+    def prune(self, app_dirs):
+        for app_dir in set(self.entries) - set(app_dirs):
+            del self.entries[app_dir]
+            self.dirty = True
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": CATALOG_VERSION, "apps": self.entries}, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+def catalog_dirs(root=CATALOG_DIR):
+    try:
+        names = sorted(os.listdir(root))
+    except OSError:
+        return []
+    return [os.path.join(root, name) for name in names if not name.startswith(".") and os.path.isdir(os.path.join(root, name))]
+
+def validate_apps(app_dirs, cache, jobs=None):
+    # Returns {app_dir: result}; unchanged apps come from the cache, the rest fan out to a process pool
+    results, pending = {}, []
+    keys = {}
+    for app_dir in app_dirs:
+        key, texts = read_app(app_dir)
+        keys[app_dir] = key
+        cached = cache.get(app_dir, key)
+        if cached is not None:
+            results[app_dir] = cached
+        else:
+            pending.append((app_dir, texts))
+    if pending and yaml is None:
+        raise RuntimeError("PyYAML isn't installed (pip install pyyaml)")
+
+    workers = max(1, min(jobs or os.cpu_count() or 1, os.cpu_count() or 1, len(pending) // CATALOG_MIN_BATCH))
+    if workers == 1:
+        checked = list(map(validate_app_job, pending))
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            checked = list(pool.map(validate_app_job, pending, chunksize=max(1, len(pending) // (workers * 4))))
+    for app_dir, result in checked:
+        results[app_dir] = result
+        cache.put(app_dir, keys[app_dir], result)
+    cache.prune(app_dirs)
+    return results, len(pending), workers
+
+def check_registry(path, apps_by_id):
+    try:
+        with open(path, "r") as f:
+            raw = f.read()
+        registry = json.loads(raw) if raw.strip() else []
+    except (OSError, ValueError) as e:
+        return [f"❌ {path} can't be read: {e}"]
+    if not isinstance(registry, list):
+        return [f"❌ {path} must be a JSON array of apps"]
+
+    issues = []
+    seen = set()
+    for idx, entry in enumerate(registry):
+        where = f"{path}[{idx}]"
+        if not isinstance(entry, dict) or not isinstance(entry.get("id"), str) or not isinstance(entry.get("name"), str):
+            issues.append(f"❌ {where} needs string id and name")
+            continue
+        app_id = entry["id"]
+        if app_id in seen:
+            issues.append(f"❌ {where}: duplicate app id {app_id}")
+        seen.add(app_id)
+        if not APP_ID.fullmatch(app_id):
+            issues.append(f"❌ {where}: id '{app_id}' isn't a lowercase slug")
+        app = apps_by_id.get(app_id)
+        if app is None:
+            continue
+        for field in ("name", "category"):
+            if entry.get(field) is not None and app[field] is not None and entry[field] != app[field]:
+                issues.append(f"⚠️  {where}: {field} '{entry[field]}' differs from apps/{app_id}/metadata.json '{app[field]}'")
+        stack = entry.get("stack") if isinstance(entry.get("stack"), dict) else {}
+        port = stack.get("defaultPort")
+        if port is not None and app["port"] is not None and port != app["port"]:
+            issues.append(f"⚠️  {where}: stack.defaultPort {port} differs from apps/{app_id}/metadata.json port {app['port']}")
+        for service in stack.get("dockerServiceNames") or ():
+            if service not in app["services"]:
+                issues.append(f"❌ {where}: stack.dockerServiceNames lists {service}, which apps/{app_id}/compose.yml doesn't define")
     return issues
 
-def check_compose_logic():
-    # Simple heuristic check
+def env_lookup(env):
+    # ${VAR} lookup for compose values: .env first, then the process environment
+    values = env.values if env is not None else {}
+
+    def lookup(name):
+        return values[name] if name in values else os.environ.get(name)
+    return lookup
+
+def load_catalog(root=CATALOG_DIR, cache=None, jobs=None, verbose=True):
+    started = time.perf_counter()
+    app_dirs = catalog_dirs(root)
+    cache = cache or CatalogCache(None)
+    results, checked, workers = validate_apps(app_dirs, cache, jobs)
+    cache.save()
+    elapsed = (time.perf_counter() - started) * 1000
+    if verbose:
+        print(f"📚 Catalog: {len(app_dirs)} apps ({len(app_dirs) - checked} cached, {checked} checked"
+              f"{f' by {workers} workers' if workers > 1 else ''}) in {elapsed:.1f} ms")
+    return app_dirs, results
+
+def check_catalog_results(app_dirs, results, registries=REGISTRY_FILES, env=None):
+    if not app_dirs:
+        return ["⚠️  No apps found in the catalog"]
+    lookup = env_lookup(env)
+    issues = []
+    apps_by_id = {}
+    containers = {}
+    claimed = {}
+    for app_dir in app_dirs:
+        result = results[app_dir]
+        issues.extend(f"{SEVERITY_PREFIX[severity]}{app_dir}: {message}" for severity, message in result["issues"])
+        if result["id"] is not None:
+            if result["id"] in apps_by_id:
+                issues.append(f"❌ {app_dir}: id {result['id']} is already used by another app")
+            apps_by_id.setdefault(result["id"], result)
+        for container in result["containers"]:
+            if container in containers:
+                issues.append(f"❌ {app_dir}: container_name {container} is also used by {containers[container]}")
+            containers.setdefault(container, app_dir)
+        for service, ports in result["services"].items():
+            for ip, number, protocol in host_ports({"ports": ports}, lookup):
+                users = claimed.setdefault((number, protocol), [])
+                for other_dir, other_ip in users:
+                    if other_dir != app_dir and ports_clash(ip, other_ip):
+                        issues.append(f"⚠️  {app_dir}: host port {number}/{protocol} is also published by {other_dir}")
+                users.append((app_dir, ip))
+    for path in registries:
+        if os.path.exists(path):
+            issues.extend(check_registry(path, apps_by_id))
+    return issues
+
+def check_catalog(root=CATALOG_DIR, registries=REGISTRY_FILES, env=None, cache_path=CATALOG_CACHE, jobs=None):
+    try:
+        app_dirs, results = load_catalog(root, CatalogCache(cache_path), jobs)
+    except RuntimeError as e:
+        return [f"⚠️  Skipping catalog checks: {e}"]
+    return check_catalog_results(app_dirs, results, registries, env)
+
+def load_compose_model(cache_path=COMPOSE_CACHE, verbose=True):
+    started = time.perf_counter()
+    model = ComposeModel.load(cache_path=cache_path)
+    elapsed = (time.perf_counter() - started) * 1000
+    source = "cached model" if model.cached else "parsed"
+    if verbose:
+        print(f"🧩 Compose: {model.service_count()} services in {len(model.stacks)} stacks ({source}, {elapsed:.1f} ms)")
+    return model
+
+def check_compose_logic(env=None, cache_path=COMPOSE_CACHE, perf=False):
     if not os.path.exists("docker-compose.yml"):
         return ["❌ docker-compose.yml missing"]
-    
-    with open("docker-compose.yml", "r") as f:
-        content = f.read()
-        
-    issues = []
-    if "network_mode: service:gluetun" in content and "VPN_SERVICE_PROVIDER=custom" in content:
-        # This is actually fine, but we can warn if provider is empty
+    try:
+        model = load_compose_model(cache_path)
+    except RuntimeError as e:
+        return [f"⚠️  Skipping compose graph checks: {e}"]
+    return check_compose_graph(model, env) + (check_compose_perf(model, env) if perf else [])
+
+class Validator:
+    """The parsed .env, compose model and catalog results, kept between checks.
+
+    run() checks everything once; refresh(paths) re-parses only the files
+    that changed and re-runs only the checks that depend on them. .env feeds
+    every check (compose ports are interpolated from it), a compose file
+    only the graph checks, and an app directory only that app plus the
+    catalog-wide checks.
+    """
+
+    def __init__(self, env_path=ENV_FILE, catalog=False, apps_dir=CATALOG_DIR, registries=REGISTRY_FILES,
+                 compose_cache=COMPOSE_CACHE, catalog_cache=CATALOG_CACHE, jobs=None, verbose=True, perf=False):
+        self.env_path = os.path.normpath(env_path)
+        self.catalog = catalog
+        self.apps_dir = os.path.normpath(apps_dir)
+        self.registries = [os.path.normpath(path) for path in registries]
+        self.compose_files = {os.path.normpath(path) for _, files in COMPOSE_STACKS for path in files}
+        self.compose_cache = compose_cache
+        self.cache = CatalogCache(catalog_cache if catalog else None)
+        self.jobs = jobs
+        self.verbose = verbose
+        self.perf = perf
+        self.ruleset = RuleSet()
+        self.env = None
+        self.model = None
+        self.model_error = None
+        self.app_dirs = []
+        self.apps = {}
+        self.issues = {"env": [], "compose": [], "catalog": []}
+        self.mtimes = {}
+
+    def run(self):
+        self.load_env()
+        self.load_compose()
+        self.check_compose()
+        if self.catalog:
+            self.load_catalog()
+            self.check_catalog()
+        self.mtimes = self.snapshot()
+        return self.all_issues()
+
+    def inputs(self):
+        paths = [self.env_path, *sorted(self.compose_files)]
+        if self.catalog:
+            # The apps/ directory's own mtime changes when an app is added or removed
+            paths += self.registries + [self.apps_dir]
+            paths += [os.path.join(app_dir, name) for app_dir in self.app_dirs for name in APP_FILES]
+        return paths
+
+    def snapshot(self):
+        state = {}
+        for path in self.inputs():
+            try:
+                stat = os.stat(path)
+                state[path] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                state[path] = None
+        return state
+
+    def revalidate(self):
+        # Re-checks whatever changed on disk since the last run (by mtime); returns the checks that re-ran
+        current = self.snapshot()
+        changed = {path for path in current.keys() | self.mtimes.keys() if current.get(path) != self.mtimes.get(path)}
+        if self.apps_dir in changed:
+            changed |= set(catalog_dirs(self.apps_dir)) ^ set(self.app_dirs)
+        ran = self.refresh(changed) if changed else []
+        self.mtimes = self.snapshot() if ran else current
+        return ran
+
+    def all_issues(self):
+        return self.issues["env"] + self.issues["compose"] + self.issues["catalog"]
+
+    def load_env(self):
+        self.env = load_env(self.env_path) if os.path.exists(self.env_path) else None
+        self.issues["env"] = check_env_security(self.env_path, self.ruleset, self.env)
+
+    def load_compose(self):
+        try:
+            self.model, self.model_error = load_compose_model(self.compose_cache, self.verbose), None
+        except RuntimeError as e:
+            self.model, self.model_error = None, f"⚠️  Skipping compose graph checks: {e}"
+
+    def check_compose(self):
+        if not os.path.exists("docker-compose.yml"):
+            self.issues["compose"] = ["❌ docker-compose.yml missing"]
+        elif self.model is None:
+            self.issues["compose"] = [self.model_error]
+        else:
+            self.issues["compose"] = check_compose_graph(self.model, self.env)
+            if self.perf:
+                self.issues["compose"] += check_compose_perf(self.model, self.env, self.ruleset)
+
+    def load_catalog(self):
+        try:
+            self.app_dirs, self.apps = load_catalog(self.apps_dir, self.cache, self.jobs, self.verbose)
+        except RuntimeError as e:
+            self.app_dirs, self.apps = [], {}
+            self.issues["catalog"] = [f"⚠️  Skipping catalog checks: {e}"]
+
+    def load_app(self, app_dir):
+        # One app re-checked in-process; a pool isn't worth it for a single directory.
+        # The cache file is rewritten on close(), not on every save
+        self.app_dirs = catalog_dirs(self.apps_dir)
+        if app_dir not in self.app_dirs:
+            self.apps.pop(app_dir, None)
+            self.cache.prune(self.app_dirs)
+        else:
+            key, texts = read_app(app_dir)
+            result = self.cache.get(app_dir, key)
+            if result is None:
+                if yaml is None:
+                    # Left unchecked; check_catalog() reports the missing dependency
+                    self.apps.pop(app_dir, None)
+                    return
+                result = validate_app(app_dir, texts)
+                self.cache.put(app_dir, key, result)
+            self.apps[app_dir] = result
+
+    def close(self):
+        self.cache.save()
+
+    def check_catalog(self):
+        if yaml is None and len(self.apps) < len(self.app_dirs):
+            self.issues["catalog"] = ["⚠️  Skipping catalog checks: PyYAML isn't installed (pip install pyyaml)"]
+            return
+        self.issues["catalog"] = check_catalog_results(self.app_dirs, self.apps, self.registries, self.env)
+
+    def classify(self, path):
+        # Which input a changed path belongs to, or None if no check reads it
+        path = os.path.normpath(path)
+        if path == self.env_path:
+            return "env"
+        if path in self.compose_files:
+            return "compose"
+        if self.catalog and path in self.registries:
+            return "registry"
+        if self.catalog and path.startswith(self.apps_dir + os.sep):
+            return "app"
+        return None
+
+    def refresh(self, paths):
+        # Returns the checks that re-ran, in order
+        kinds = {}
+        for path in paths:
+            kind = self.classify(path)
+            if kind:
+                kinds.setdefault(kind, set()).add(os.path.normpath(path))
+        if "env" in kinds:
+            self.load_env()
+        if "compose" in kinds:
+            self.load_compose()
+        if "env" in kinds or "compose" in kinds:
+            self.check_compose()
+        for path in sorted(kinds.get("app", ())):
+            name = os.path.relpath(path, self.apps_dir).split(os.sep)[0]
+            self.load_app(os.path.join(self.apps_dir, name))
+        if self.catalog and kinds.keys() & {"env", "app", "registry"}:
+            self.check_catalog()
+        ran = ["env"] if "env" in kinds else []
+        ran += ["compose"] if kinds.keys() & {"env", "compose"} else []
+        ran += ["catalog"] if self.catalog and kinds.keys() & {"env", "app", "registry"} else []
+        return ran
+
+class InotifyWatcher:
+    """Directory watches through inotify(7), called via ctypes so nothing extra is needed.
+
+    Directories are watched rather than files because editors save by
+    writing a temp file and renaming it over the original.
+    """
+
+    EVENT = struct.Struct("iIII")
+    IN_MODIFY, IN_MOVED_FROM, IN_MOVED_TO = 0x2, 0x40, 0x80
+    IN_CLOSE_WRITE, IN_CREATE, IN_DELETE = 0x8, 0x100, 0x200
+    IN_Q_OVERFLOW, IN_ISDIR = 0x4000, 0x40000000
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    def __init__(self, directories, recursive=()):
+        import ctypes
+        import ctypes.util
+
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = {}
+        self.recursive = [os.path.normpath(root) for root in recursive]
+        for directory in directories:
+            self.add(directory)
+        for root in self.recursive:
+            self.add_tree(root)
+
+    def add(self, directory):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK)
+        if wd >= 0:
+            self.dirs[wd] = os.path.normpath(directory)
+
+    def add_tree(self, root):
+        for dirpath, dirnames, _ in os.walk(root):
+            self.add(dirpath)
+
+    def read(self, timeout=None):
+        # Returns the paths that changed, or {WATCH_EVERYTHING} if the kernel queue overflowed
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return set()
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+            name = os.fsdecode(data[offset + self.EVENT.size:offset + self.EVENT.size + length].rstrip(b"\0"))
+            offset += self.EVENT.size + length
+            if mask & self.IN_Q_OVERFLOW:
+                return {WATCH_EVERYTHING}
+            directory = self.dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.normpath(os.path.join(directory, name))
+            if mask & self.IN_ISDIR and mask & (self.IN_CREATE | self.IN_MOVED_TO) and \
+                    any(path.startswith(root + os.sep) for root in self.recursive):
+                self.add_tree(path)
+            changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+class PollWatcher:
+    """Fallback for systems without inotify: compares mtimes and sizes every interval."""
+
+    def __init__(self, directories, recursive=(), interval=WATCH_POLL_INTERVAL):
+        self.directories = [os.path.normpath(d) for d in directories]
+        self.recursive = [os.path.normpath(root) for root in recursive]
+        self.interval = interval
+        self.state = self.snapshot()
+
+    def snapshot(self):
+        state = {}
+        for directory in self.directories:
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        state[os.path.normpath(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+                except OSError:
+                    pass
+        for root in self.recursive:
+            for dirpath, _, filenames in os.walk(root):
+                for name in filenames:
+                    path = os.path.normpath(os.path.join(dirpath, name))
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    state[path] = (stat.st_mtime_ns, stat.st_size)
+        return state
+
+    def read(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            time.sleep(self.interval if deadline is None else max(0, min(self.interval, deadline - time.monotonic())))
+            state = self.snapshot()
+            changed = {path for path in state.keys() | self.state.keys() if state.get(path) != self.state.get(path)}
+            self.state = state
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
         pass
-        
-    return issues
 
-if __name__ == "__main__":
-    all_issues = check_env_security() + check_compose_logic()
-    
-    if all_issues:
+def print_issues(issues):
+    if issues:
         print("\nFound the following potential issues:")
-        for issue in all_issues:
+        for issue in issues:
             print(issue)
-        sys.exit(1)
     else:
         print("✅ AI Validation passed. Configuration looks secure and logical.")
-        sys.exit(0)
+
+def watch(validator, poll=False, interval=WATCH_POLL_INTERVAL):
+    directories = {os.path.dirname(validator.env_path) or ".", "."}
+    recursive = []
+    if validator.catalog:
+        directories.update(os.path.dirname(path) for path in validator.registries if os.path.isdir(os.path.dirname(path)))
+        if os.path.isdir(validator.apps_dir):
+            recursive.append(validator.apps_dir)
+    watcher = None
+    if not poll:
+        try:
+            watcher, how = InotifyWatcher(directories, recursive), "inotify"
+        except (OSError, AttributeError):
+            pass
+    if watcher is None:
+        watcher, how = PollWatcher(directories, recursive, interval), f"polling every {interval:g}s"
+    targets = [validator.env_path, "docker-compose*.yml"] + ([f"{validator.apps_dir}/**"] if validator.catalog else [])
+    print(f"\n👀 Watching {', '.join(targets)} ({how}); Ctrl-C to stop", flush=True)
+
+    previous = validator.all_issues()
+    try:
+        while True:
+            changed = watcher.read()
+            # Editors often write, rename and chmod in quick succession; take them as one save
+            while True:
+                more = watcher.read(WATCH_DEBOUNCE)
+                if not more:
+                    break
+                changed |= more
+            started = time.perf_counter()
+            if WATCH_EVERYTHING in changed:
+                validator.run()
+                ran, relevant = ["everything"], ["(event queue overflowed)"]
+            else:
+                relevant = sorted(path for path in changed if validator.classify(path))
+                ran = validator.refresh(relevant)
+            if not ran:
+                continue
+            elapsed = (time.perf_counter() - started) * 1000
+            current = validator.all_issues()
+            shown = ", ".join(relevant[:3]) + (f" and {len(relevant) - 3} more" if len(relevant) > 3 else "")
+            print(f"\n🔁 {time.strftime('%H:%M:%S')} {shown} changed; re-ran {', '.join(ran)} in {elapsed:.1f} ms")
+            before, after = set(previous), set(current)
+            for issue in current:
+                if issue not in before:
+                    print(issue)
+            for issue in previous:
+                if issue not in after:
+                    print(f"✅ Fixed: {issue}")
+            if not current:
+                print("✅ AI Validation passed. Configuration looks secure and logical.")
+            elif before == after:
+                print(f"   No change: {len(current)} issues remain")
+            sys.stdout.flush()
+            previous = current
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching.")
+    finally:
+        watcher.close()
+        validator.close()
+
+def split_issue(issue):
+    # "⚠️  CRITICAL: message" -> ("critical", "message")
+    for severity in ("critical", "error", "warning", "perf"):
+        if issue.startswith(SEVERITY_PREFIX[severity]):
+            return severity, issue[len(SEVERITY_PREFIX[severity]):]
+    return "warning", issue
+
+def validate(env_path=ENV_FILE, catalog=False, **options):
+    """Runs every check once and returns the issues, without printing or exiting.
+
+    Callers that check repeatedly should keep a Validator and call
+    revalidate(), which only re-reads files whose mtime changed.
+    """
+    return Validator(env_path, catalog=catalog, verbose=False, **options).run()
+
+class ValidationHandler:
+    """Request handling for the --serve endpoints, mixed into BaseHTTPRequestHandler by make_server.
+
+    http.server is imported only when serving, so one-shot runs don't pay for it.
+    """
+
+    protocol_version = "HTTP/1.1" # Keep-alive, so a client pays the connect once
+    server_version = "ai_validator/1"
+
+    def do_GET(self):
+        path = self.path.partition("?")[0]
+        if path == "/validate":
+            self.reply(200, self.server.validate())
+        elif path == "/health":
+            self.reply(200, {"ok": True, "uptime_s": round(time.time() - self.server.started, 1), "requests": self.server.requests})
+        else:
+            self.reply(404, {"error": f"unknown path {path}; try /validate or /health"})
+
+    def do_POST(self):
+        # The body is ignored, but on a keep-alive connection it has to be read
+        # off the socket or it is parsed as the next request
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0 or self.headers.get("Transfer-Encoding"):
+            self.close_connection = True
+        while length > 0:
+            chunk = self.rfile.read(min(length, 65536))
+            if not chunk:
+                break
+            length -= len(chunk)
+        self.do_GET()
+
+    def reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        return "local" # unix socket peers have no address
+
+    def log_message(self, format, *args):
+        pass # ValidationServer.validate logs what matters
+
+class ValidationServer:
+    """Serves one warm Validator; requests are serialized on its lock."""
+
+    daemon_threads = True
+
+    def attach(self, validator):
+        self.validator = validator
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+
+    def validate(self):
+        with self.lock:
+            started = time.perf_counter()
+            ran = self.validator.revalidate()
+            issues = self.validator.all_issues()
+            elapsed = (time.perf_counter() - started) * 1000
+            self.requests += 1
+        if ran and self.validator.verbose:
+            print(f"🔁 {time.strftime('%H:%M:%S')} re-ran {', '.join(ran)} in {elapsed:.1f} ms ({len(issues)} issues)", flush=True)
+        return {
+            "ok": not issues,
+            "issues": [dict(zip(("severity", "message"), split_issue(issue))) for issue in issues],
+            "reran": ran,
+            "elapsed_ms": round(elapsed, 3),
+        }
+
+def is_unix_address(address):
+    return "/" in address or address.endswith(".sock")
+
+def make_server(address, validator):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from socketserver import ThreadingMixIn, UnixStreamServer
+
+    handler = type("Handler", (ValidationHandler, BaseHTTPRequestHandler), {})
+    if is_unix_address(address):
+        if os.path.exists(address):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(address)
+                raise OSError(f"{address} is already served by a running validator")
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(address) # Left over from a validator that didn't shut down cleanly
+            finally:
+                probe.close()
+        directory = os.path.dirname(address)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        server = type("UnixServer", (ValidationServer, ThreadingMixIn, UnixStreamServer), {})(address, handler)
+    else:
+        host, _, port = address.rpartition(":")
+        # Headers and body go out as two writes; without TCP_NODELAY the second waits on a delayed ACK (~40 ms)
+        handler.disable_nagle_algorithm = True
+        server = type("LocalServer", (ValidationServer, ThreadingHTTPServer), {})((host or "127.0.0.1", int(port)), handler)
+    server.attach(validator)
+    return server
+
+def serve(validator, address=SERVE_SOCKET):
+    server = make_server(address, validator)
+    where = f"unix:{address}" if is_unix_address(address) else f"http://{address}"
+    print(f"\n🛰️  Serving on {where}: GET /validate, GET /health; Ctrl-C to stop", flush=True)
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt # docker stop / systemd send SIGTERM; shut down the same way as Ctrl-C
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopped serving.")
+    finally:
+        server.server_close()
+        if is_unix_address(address) and os.path.exists(address):
+            os.unlink(address)
+        validator.close()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Check .env and docker-compose.yml for unsafe or inconsistent settings.")
+    parser.add_argument("--env-file", default=ENV_FILE, help=f"Env file to check (default: {ENV_FILE})")
+    parser.add_argument("--timings", action="store_true", help="Print time spent in each rule")
+    parser.add_argument("--compose-cache", default=COMPOSE_CACHE, help=f"Cached compose model (default: {COMPOSE_CACHE})")
+    parser.add_argument("--no-cache", action="store_true", help="Re-parse and re-check everything instead of using the caches")
+    parser.add_argument("--perf", action="store_true", help="Also lint compose for throughput problems (transcode disk, "
+                                                                "GPU, hardlinks, limits, healthchecks)")
+    parser.add_argument("--catalog", action="store_true", help=f"Also validate every app in {CATALOG_DIR}/ and the app registries")
+    parser.add_argument("--apps-dir", default=CATALOG_DIR, help=f"App catalog directory (default: {CATALOG_DIR})")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes for --catalog (default: CPU count)")
+    parser.add_argument("--watch", action="store_true", help="Keep running and re-check whatever a saved file affects")
+    parser.add_argument("--poll", action="store_true", help="With --watch, poll mtimes instead of using inotify")
+    parser.add_argument("--poll-interval", type=float, default=WATCH_POLL_INTERVAL,
+                        help=f"Seconds between polls with --poll or without inotify (default: {WATCH_POLL_INTERVAL})")
+    parser.add_argument("--serve", nargs="?", const=SERVE_SOCKET, metavar="ADDRESS",
+                        help=f"Keep the models warm and answer GET /validate over HTTP on a unix socket path or HOST:PORT "
+                             f"(default: {SERVE_SOCKET})")
+    args = parser.parse_args(argv)
+    if args.watch and args.serve:
+        parser.error("--watch and --serve can't be combined")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    print("🤖 AI Config Validator running...")
+    validator = Validator(args.env_file, catalog=args.catalog, apps_dir=args.apps_dir,
+                          compose_cache=None if args.no_cache else args.compose_cache,
+                          catalog_cache=None if args.no_cache else CATALOG_CACHE, jobs=args.jobs, perf=args.perf)
+    all_issues = validator.run()
+    if args.timings:
+        print_timings(validator.ruleset)
+    print_issues(all_issues)
+    if args.watch:
+        watch(validator, args.poll, args.poll_interval)
+        return 0
+    if args.serve:
+        try:
+            serve(validator, args.serve)
+        except (OSError, ValueError) as e:
+            print(f"❌ Can't serve on {args.serve}: {e}")
+            return 1
+        return 0
+    return 1 if all_issues else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,153 @@
 #!/usr/bin/env python3
+import argparse
+import functools
+import glob
+import gzip
+import hashlib
+import heapq
+import http.client
+import json
+import mmap
+import os
+import queue
+import re
+import shutil
+import socket
+import sqlite3
+import struct
 import subprocess
 import sys
+import tarfile
+import threading
+import time
+from array import array
+from collections import Counter, OrderedDict, deque, namedtuple
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote, urlencode
 
+MAX_SAMPLES = 10 # Unique findings (templates) shown in the summary
+REPORT_SCHEMA = "analyze_logs.report/v1"
+EVENT_SCHEMA = "analyze_logs.event/v1"
+OUTPUT_FORMATS = ["text", "json", "ndjson"]
+MAX_TEMPLATES = 2000 # Live templates kept by the miner before the least recently seen is evicted
+
+# Sliding windows reported by --follow, and the bucket width they are built from
+ROLLING_WINDOWS = [("1m", 60), ("5m", 300), ("1h", 3600)]
+BUCKET_SECONDS = 10
+TOP_K = 20 # Heavy-hitter counters kept per service
+HISTOGRAM_MINUTES = 7 * 24 * 60 # Per-minute error-rate history kept per service
+SPIKE_MIN_ERRORS = 5
+SPIKE_FACTOR = 4.0 # Errors in a minute vs. the moving average that count as a spike
+SPIKE_ALPHA = 0.1
+
+# Ordered from least to most severe; the index is the rank
+SEVERITIES = ["warning", "error", "critical"]
+
+# Every pattern carries literal keywords used as a cheap gate before its regex
+# runs; the regex refines the match and defaults to the keywords themselves.
+Pattern = namedtuple("Pattern", "name severity keywords regex")
+
+def pattern(name, severity, *keywords, regex=None):
+    return Pattern(name, severity, keywords, regex)
+
+# Applied to every service
+BASE_PATTERNS = [
+    pattern("panic", "critical", "panic"),
+    pattern("fatal", "critical", "fatal", regex=r"fatal\b"),
+    pattern("exception", "error", "exception", regex=r"exception\b"),
+    pattern("traceback", "error", "traceback (most recent call last)"),
+    pattern("error", "error", "error", "[err]", regex=r"error\b|\[err\]"),
+    pattern("unauthorized", "warning", "unauthori", regex=r"unauthori[sz]ed"),
+    pattern("warning", "warning", "warn", "[wrn]", regex=r"\bwarn(?:ing)?\b|\[wrn\]"),
+]
+
+# Extra patterns layered on top of BASE_PATTERNS for specific services
+SERVICE_PACKS = {
+    "gluetun": [
+        pattern("vpn_auth_failed", "critical", "auth_failed", "authentication failed"),
+        pattern("vpn_unhealthy", "error", "unhealthy", regex=r"program has been unhealthy|healthcheck.*unhealthy"),
+        pattern("vpn_restart", "warning", "restarting vpn"),
+        pattern("dns_failure", "warning", "no such host", "dns", regex=r"no such host|dns.*(?:timeout|failed)"),
+    ],
+    "authelia": [
+        pattern("auth_failure", "warning", "unsuccessful", regex=r"unsuccessful (?:1fa|2fa) authentication attempt"),
+        pattern("user_banned", "warning", "banned", "regulation", regex=r"user .* is banned|regulation"),
+        pattern("config_invalid", "critical", "configuration", regex=r"configuration key .* invalid|failed to validate configuration"),
+    ],
+    "qbittorrent": [
+        pattern("disk_full", "critical", "no space left on device"),
+        pattern("file_error", "error", "file error", "i/o error"),
+        pattern("webui_login_failure", "warning", "webapi login failure"),
+        pattern("tracker_error", "warning", "tracker", regex=r"tracker.*(?:error|timed out)"),
+    ],
+    "arr": [
+        pattern(
+            "download_client_unavailable", "error", "download client", "unable to connect to",
+            regex=r"download clients? (?:are|is) unavailable|unable to connect to (?:qbittorrent|download client)",
+        ),
+        pattern("indexer_unavailable", "warning", "indexer", regex=r"indexers? (?:are|is) unavailable"),
+        pattern("database_locked", "error", "database is locked"),
+        pattern("import_failed", "warning", "import failed", "couldn't import"),
+    ],
+}
+
+# Services that share a pack
+PACK_ALIASES = {
+    "sonarr": "arr",
+    "radarr": "arr",
+    "lidarr": "arr",
+    "readarr": "arr",
+    "prowlarr": "arr",
+    "bazarr": "arr",
+    "whisparr": "arr",
+}
+
+Finding = namedtuple("Finding", "service pattern severity")
+
+# Variable parts of a log line, masked before lines are grouped into templates
+TEMPLATE_MASKS = [
+    (re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?"), "<TS>"),
+    (re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"), "<UUID>"),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<IP>"),
+    (re.compile(r"\b(?:0x[0-9a-fA-F]+|[0-9a-fA-F]*\d[0-9a-fA-F]*[a-fA-F][0-9a-fA-F]{6,}|[0-9a-fA-F]{6,}[a-fA-F][0-9a-fA-F]*\d[0-9a-fA-F]*)\b"), "<HEX>"),
+    (re.compile(r"(?<![\w.])[-+]?\d+(?:\.\d+)?(?:ns|us|ms|s|m|h|%|[kKmMgG]i?[bB])?\b"), "<NUM>"),
+]
+WILDCARD = "<*>"
+
+# Multi-line events (stack traces) are stitched per container up to this size
+MAX_EVENT_LINES = 256
+MAX_EVENT_BYTES = 64 * 1024
+STITCH_IDLE_SECONDS = 2 # --follow closes a trace once its container goes quiet
+TRACEBACK_HEAD = "Traceback (most recent call last)"
+# Non-indented lines that still belong to the trace above them (Java, .NET, Python)
+TRACE_CONTINUATIONS = ("Caused by:", "... ", "--- End of", "---> ", "Suppressed:")
+# --history: rotated/compressed logs and backup tarballs, scanned one file per worker process
+HISTORY_TAR_SUFFIXES = (".tar.gz", ".tgz", ".tar")
+ROTATION_SUFFIX = re.compile(r"(?:\.(?:gz|log|txt|json|\d+))+$")
+TIMELINE_LOOKAHEAD = 256 # Lines per stream that may arrive out of timestamp order
+BURST_MIN_SERVICES = 2 # Services failing in the same 10s bucket that make a correlated burst
+BURST_MIN_FINDINGS = 3
+MAX_BURSTS = 50 # Bursts kept for the report
+PYTHON_CHAIN = ("During handling of the above exception", "The above exception was the direct cause", TRACEBACK_HEAD)
+
+DEFAULT_STATE_FILE = os.path.join("data", "analyze_logs", "cursors.json")
+MAX_CURSOR_DIGESTS = 256 # Lines remembered at the cursor's exact timestamp
+
+DEFAULT_ARCHIVE_DIR = os.path.join("data", "analyze_logs", "archive")
+ARCHIVE_BATCH_SIZE = 5000 # Rows per write transaction
+ARCHIVE_RETENTION_DAYS = 14
+
+DOCKER_CONTAINERS_DIR = "/var/lib/docker/containers"
+DEFAULT_DOCKER_SOCKET = "/var/run/docker.sock"
+DOCKER_API_VERSION = "v1.41" # Docker 20.10+, older than anything we support
+COMPOSE_SERVICE_LABEL = "com.docker.compose.service"
+COMPOSE_PROJECT_LABEL = "com.docker.compose.project"
+COMPOSE_NUMBER_LABEL = "com.docker.compose.container-number"
+
+GO_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ns|us|µs|ms|s|m|h)")
+DURATION_SECONDS = {"ns": 1e-9, "us": 1e-6, "µs": 1e-6, "ms": 1e-3, "s": 1, "m": 60, "h": 3600}
+
+@functools.lru_cache(maxsize=None)
 def get_compose_cmd():
     try:
         probe = subprocess.run(["docker", "compose", "version"], capture_output=True, text=True)
@@ -11,40 +157,2207 @@ def get_compose_cmd():
         pass
     return ["docker-compose"]
 
-def analyze_logs(container_name="all"):
-    print(f"🧠 Analyzing logs for: {container_name}...")
-    
-    cmd = get_compose_cmd() + ["logs", "--tail=100"]
+def build_logs_cmd(compose_cmd, container_name="all", since=None, until=None, tail="100", follow=False, timestamps=True):
+    cmd = compose_cmd + ["logs", "--no-color"]
+    if follow:
+        cmd.append("--follow")
+    if timestamps:
+        cmd.append("--timestamps")
+    if tail is not None:
+        cmd.append(f"--tail={tail}")
+    if since:
+        cmd.append(f"--since={since}")
+    if until:
+        cmd.append(f"--until={until}")
     if container_name != "all":
         cmd.append(container_name)
-        
+    return cmd
+
+def open_log_stream(cmd):
+    return subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        errors="replace",
+        bufsize=1,
+    )
+
+def close_log_stream(proc):
+    if proc.poll() is None:
+        proc.terminate()
+    proc.stdout.close()
+    proc.wait()
+
+def to_unix_time(value, now=None):
+    # Accepts what `docker logs --since/--until` does: Go durations, epoch seconds or RFC 3339
+    if value is None:
+        return None
+    value = str(value).strip()
+    now = time.time() if now is None else now
+    parts = GO_DURATION.findall(value)
+    if parts and "".join(num + unit for num, unit in parts) == value:
+        return now - sum(float(num) * DURATION_SECONDS[unit] for num, unit in parts)
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        logs = result.stdout
-    except Exception as e:
-        print(f"Error reading logs: {e}")
-        return
+        return float(value)
+    except ValueError:
+        pass
+    stamp = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return stamp.timestamp()
+
+def docker_socket_path():
+    host = os.environ.get("DOCKER_HOST", "")
+    if host.startswith("unix://"):
+        return host[len("unix://"):]
+    if host:
+        return None # tcp:// or ssh:// hosts go through the CLI
+    return DEFAULT_DOCKER_SOCKET
+
+def compose_project_name(compose_file="docker-compose.yml"):
+    name = os.environ.get("COMPOSE_PROJECT_NAME")
+    if not name:
+        try:
+            with open(compose_file, "r") as f:
+                for line in f:
+                    if line.startswith("name:"):
+                        name = line.split(":", 1)[1].split("#")[0].strip().strip("\"'")
+                        break
+        except OSError:
+            pass
+    if not name:
+        name = os.path.basename(os.path.dirname(os.path.abspath(compose_file)))
+    return re.sub(r"[^a-z0-9_-]", "", name.lower())
+
+class DockerApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(f"Docker API error {status}: {message}")
+        self.status = status
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+class DockerClient:
+    """Minimal Docker Engine API client over the unix socket.
+
+    Connections are kept alive and reused through a small pool, so repeated
+    calls skip both process spawning and the socket handshake.
+    """
+
+    def __init__(self, socket_path=None, pool_size=4, timeout=30):
+        self.socket_path = socket_path or docker_socket_path()
+        self.timeout = timeout
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+
+    def available(self):
+        return bool(self.socket_path) and os.path.exists(self.socket_path) and os.access(self.socket_path, os.R_OK | os.W_OK)
+
+    def _connection(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return UnixHTTPConnection(self.socket_path, timeout=self.timeout)
+
+    def _release(self, conn, resp):
+        if resp.will_close or not resp.isclosed():
+            conn.close()
+            return
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def _request(self, path, params=None):
+        url = f"/{DOCKER_API_VERSION}{path}"
+        if params:
+            url += "?" + urlencode(params)
+        conn = self._connection()
+        try:
+            conn.request("GET", url)
+            return conn, conn.getresponse()
+        except (http.client.HTTPException, OSError):
+            # A pooled connection may have been closed by the daemon; retry once on a fresh one
+            conn.close()
+            conn = UnixHTTPConnection(self.socket_path, timeout=self.timeout)
+            conn.request("GET", url)
+            return conn, conn.getresponse()
+
+    def get_json(self, path, params=None):
+        conn, resp = self._request(path, params)
+        body = resp.read()
+        self._release(conn, resp)
+        if resp.status >= 400:
+            try:
+                message = json.loads(body).get("message", "")
+            except ValueError:
+                message = body.decode("utf-8", "replace")
+            raise DockerApiError(resp.status, message)
+        return json.loads(body) if body else None
+
+    def ping(self):
+        conn, resp = self._request("/_ping")
+        body = resp.read()
+        self._release(conn, resp)
+        return resp.status == 200 and body.strip() == b"OK"
+
+    def logs(self, container_id, since=None, until=None, tail=None, follow=False, timestamps=False):
+        params = {"stdout": "1", "stderr": "1", "follow": "1" if follow else "0", "timestamps": "1" if timestamps else "0"}
+        if since is not None:
+            params["since"] = f"{to_unix_time(since):.9f}"
+        if until is not None:
+            params["until"] = f"{to_unix_time(until):.9f}"
+        if tail is not None:
+            params["tail"] = str(tail)
+        conn, resp = self._request(f"/containers/{quote(container_id)}/logs", params)
+        if resp.status >= 400:
+            body = resp.read()
+            self._release(conn, resp)
+            raise DockerApiError(resp.status, body.decode("utf-8", "replace").strip())
+        if follow:
+            conn.sock.settimeout(None)
+        return LogResponse(self, conn, resp)
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+class LogResponse:
+    """Iterates decoded log lines from a /containers/{id}/logs response.
+
+    Containers without a TTY send an 8-byte header per frame (stream type and
+    payload size); frames do not line up with newlines, so partial lines are
+    carried over per stream. TTY containers send the raw byte stream.
+    """
+
+    def __init__(self, client, conn, resp):
+        self.client = client
+        self.conn = conn
+        self.resp = resp
+        self.done = False
+        self.closed = False
+        self.reading = False
+        self._lock = threading.Lock()
+
+    def _multiplexed(self):
+        kind = self.resp.getheader("Content-Type", "")
+        if "multiplexed" in kind:
+            return True
+        head = self.resp.peek(8)[:8]
+        return len(head) == 8 and head[0] in (0, 1, 2) and head[1:4] == b"\0\0\0"
+
+    def _frames(self):
+        pending = {}
+        while True:
+            header = self.resp.read(8)
+            if len(header) < 8:
+                break
+            stream, size = struct.unpack(">BxxxL", header)
+            data = pending.pop(stream, b"") + self.resp.read(size)
+            *lines, rest = data.split(b"\n")
+            if rest:
+                pending[stream] = rest
+            yield from lines
+        yield from (rest for rest in pending.values() if rest)
+
+    def __iter__(self):
+        self.reading = True
+        try:
+            if self.closed:
+                return
+            raw = self._frames() if self._multiplexed() else iter(self.resp.readline, b"")
+            for line in raw:
+                yield line.decode("utf-8", "replace").rstrip("\r\n")
+            # A shut-down socket reads as a clean end of stream
+            self.done = not self.closed
+        except (OSError, ValueError, http.client.HTTPException):
+            if self.closed:
+                return # closed from another thread
+            raise
+        finally:
+            self.reading = False
+            self._finish()
+
+    def _finish(self):
+        # Only the reading thread, or close() when nobody is reading, gets here
+        with self._lock:
+            conn, self.conn = self.conn, None
+        if conn is None:
+            return
+        if self.done:
+            self.client._release(conn, self.resp)
+        else:
+            conn.close()
+
+    def close(self):
+        self.closed = True
+        conn = self.conn
+        if conn is None:
+            return
+        if not self.reading:
+            self._finish()
+            return
+        # Unblock a reader waiting on a followed stream and let it close the
+        # connection; closing it here would pull the socket out from under
+        # http.client mid-read
+        sock = conn.sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+class LogStream:
+    """Lines from one or more log producers, closable from another thread."""
+
+    def __init__(self, producers, follow=False):
+        self.producers = producers
+        self.follow = follow
+        self.closed = False
+
+    def __iter__(self):
+        if not self.follow or len(self.producers) <= 1:
+            for producer in self.producers:
+                if self.closed:
+                    return
+                yield from producer()
+            return
+
+        # Followed streams never end, so each container gets a reader thread
+        lines = queue.Queue(maxsize=10000)
+        remaining = len(self.producers)
+
+        def pump(producer):
+            try:
+                for line in producer():
+                    lines.put(line)
+            finally:
+                lines.put(None)
+
+        for producer in self.producers:
+            threading.Thread(target=pump, args=(producer,), daemon=True).start()
+        while remaining:
+            line = lines.get()
+            if line is None:
+                remaining -= 1
+            else:
+                yield line
+
+    def close(self):
+        self.closed = True
+        for producer in self.producers:
+            getattr(producer, "close", lambda: None)()
+
+class CliLogSource:
+    name = "cli"
+
+    def __init__(self, compose_file="docker-compose.yml"):
+        self.compose_file = compose_file
+
+    @property
+    def compose_name(self):
+        return " ".join(get_compose_cmd())
+
+    def services(self):
+        return list_services(self.compose_file)
+
+    def open(self, service="all", since=None, until=None, tail="100", follow=False):
+        cmd = build_logs_cmd(get_compose_cmd(), service, since=since, until=until, tail=tail, follow=follow)
+        proc = open_log_stream(cmd)
+
+        # Read compose output line by line so memory stays flat no matter how much we scan
+        def produce():
+            try:
+                for line in proc.stdout:
+                    yield line.rstrip("\r\n")
+            except ValueError:
+                return # stdout closed from another thread
+            finally:
+                close_log_stream(proc)
+
+        produce.close = lambda: close_log_stream(proc)
+        return LogStream([produce], follow=follow)
+
+class DockerApiSource:
+    name = "api"
+    compose_name = "docker compose"
+
+    def __init__(self, client=None, compose_file="docker-compose.yml", project=None):
+        self.client = client or DockerClient()
+        self.project = project or compose_project_name(compose_file)
+
+    def containers(self, service=None):
+        labels = [f"{COMPOSE_PROJECT_LABEL}={self.project}"]
+        if service:
+            labels.append(f"{COMPOSE_SERVICE_LABEL}={service}")
+        found = self.client.get_json("/containers/json", {"all": "1", "filters": json.dumps({"label": labels})})
+        containers = []
+        for item in found or []:
+            item_labels = item.get("Labels") or {}
+            name = item_labels.get(COMPOSE_SERVICE_LABEL) or (item.get("Names") or ["/?"])[0].lstrip("/")
+            containers.append((item["Id"], name, item_labels.get(COMPOSE_NUMBER_LABEL, "1")))
+        if not containers and service:
+            # Fall back to a plain container name such as `gluetun`
+            try:
+                item = self.client.get_json(f"/containers/{quote(service)}/json")
+            except DockerApiError as e:
+                if e.status != 404:
+                    raise
+            else:
+                item_labels = (item.get("Config") or {}).get("Labels") or {}
+                containers.append((item["Id"], item_labels.get(COMPOSE_SERVICE_LABEL, service), item_labels.get(COMPOSE_NUMBER_LABEL, "1")))
+        return sorted(containers, key=lambda c: (c[1], c[2]))
+
+    def services(self):
+        return sorted({name for _, name, _ in self.containers()})
+
+    def open(self, service="all", since=None, until=None, tail="100", follow=False):
+        producers = []
+        for container_id, name, number in self.containers(None if service == "all" else service):
+            producers.append(self._producer(container_id, f"{name}-{number}", since, until, tail, follow))
+        return LogStream(producers, follow=follow)
+
+    def _producer(self, container_id, prefix, since, until, tail, follow):
+        state = {}
+
+        def produce():
+            response = self.client.logs(container_id, since=since, until=until, tail=tail, follow=follow, timestamps=True)
+            state["response"] = response
+            if state.get("closed"):
+                response.close()
+            # Same shape as `docker compose logs` so the rest of the pipeline is source-agnostic
+            for line in response:
+                yield f"{prefix}  | {line}"
+
+        def close():
+            state["closed"] = True
+            if "response" in state:
+                state["response"].close()
+
+        produce.close = close
+        return produce
+
+def normalize_stamp(stamp):
+    # json-file trims trailing zeros from the nanoseconds; pad so stamps compare as strings
+    if len(stamp) == 30 or not stamp.endswith("Z"):
+        return stamp
+    head, _, fraction = stamp[:-1].partition(".")
+    return f"{head}.{fraction:0<9}Z"
+
+def json_log_time(raw):
+    # Pull "time" out of a json-file entry without decoding the whole line
+    key = raw.rfind(b'"time":')
+    if key == -1:
+        return ""
+    start = raw.find(b'"', key + 7) + 1
+    end = raw.find(b'"', start)
+    if start == 0 or end == -1:
+        return ""
+    return normalize_stamp(raw[start:end].decode("ascii", "replace"))
+
+class JsonLogFile:
+    """One json-file log (current, rotated or gzip-compressed) for a container.
+
+    Plain files are memory-mapped: the first line in a time window is found by
+    binary search over line starts, and only lines inside the window are
+    decoded. Compressed rotations cannot be mapped and are streamed instead.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.compressed = path.endswith(".gz")
+
+    def modified_before(self, stamp):
+        # A rotated file is never written again, so its mtime bounds its newest line
+        modified = datetime.fromtimestamp(os.path.getmtime(self.path), timezone.utc)
+        return modified.strftime("%Y-%m-%dT%H:%M:%S.%f000Z") < stamp
+
+    @staticmethod
+    def _seek(mm, since):
+        lo, hi = 0, len(mm)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = mm.rfind(b"\n", 0, mid) + 1
+            end = mm.find(b"\n", start)
+            end = len(mm) if end == -1 else end
+            if json_log_time(mm[start:end]) < since:
+                lo = end + 1
+            else:
+                hi = start
+        return lo
+
+    def raw_lines(self, since=None, until=None):
+        if self.compressed:
+            with gzip.open(self.path, "rb") as f:
+                for raw in f:
+                    stamp = json_log_time(raw)
+                    if since and stamp < since:
+                        continue
+                    if until and stamp > until:
+                        return
+                    yield raw
+            return
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                pos = self._seek(mm, since) if since else 0
+                size = len(mm)
+                while pos < size:
+                    end = mm.find(b"\n", pos)
+                    end = size if end == -1 else end
+                    raw = mm[pos:end]
+                    pos = end + 1
+                    if until and json_log_time(raw) > until:
+                        return
+                    yield raw
+
+    def tail_lines(self, count):
+        if self.compressed:
+            with gzip.open(self.path, "rb") as f:
+                return list(deque(f, maxlen=count))
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                end = len(mm)
+                if mm[end - 1:end] == b"\n":
+                    end -= 1
+                pos = end
+                for _ in range(count):
+                    pos = mm.rfind(b"\n", 0, pos)
+                    if pos == -1:
+                        break
+                return mm[pos + 1:end].split(b"\n")
+
+class JsonFileSource:
+    """Reads container logs straight from Docker's json-file driver output."""
+
+    name = "files"
+    compose_name = "docker compose"
+
+    def __init__(self, root=DOCKER_CONTAINERS_DIR, compose_file="docker-compose.yml", project=None):
+        self.root = root
+        self.project = project or compose_project_name(compose_file)
+
+    def containers(self, service=None):
+        containers = []
+        for config_path in glob.glob(os.path.join(self.root, "*", "config.v2.json")):
+            try:
+                with open(config_path, "r") as f:
+                    config = json.load(f)
+            except (OSError, ValueError):
+                continue
+            labels = (config.get("Config") or {}).get("Labels") or {}
+            name = config.get("Name", "").lstrip("/")
+            project = labels.get(COMPOSE_PROJECT_LABEL)
+            if project and project != self.project:
+                continue
+            service_name = labels.get(COMPOSE_SERVICE_LABEL) or name
+            if service and service not in (service_name, name):
+                continue
+            if not project and not service:
+                continue # not part of a compose project and not asked for by name
+            containers.append((config.get("ID") or os.path.basename(os.path.dirname(config_path)), service_name,
+                               labels.get(COMPOSE_NUMBER_LABEL, "1"), os.path.dirname(config_path)))
+        return sorted(containers, key=lambda c: (c[1], c[2]))
+
+    def services(self):
+        return sorted({name for _, name, _, _ in self.containers()})
+
+    @staticmethod
+    def log_files(directory, container_id):
+        # Oldest first: <id>-json.log.N[.gz] ... <id>-json.log.1[.gz], <id>-json.log
+        base = os.path.join(directory, f"{container_id}-json.log")
+        rotated = []
+        for path in glob.glob(base + ".*"):
+            suffix = path[len(base) + 1:]
+            number = suffix[:-3] if suffix.endswith(".gz") else suffix
+            if number.isdigit():
+                rotated.append((int(number), path))
+        files = [JsonLogFile(path) for _, path in sorted(rotated, reverse=True)]
+        if os.path.exists(base):
+            files.append(JsonLogFile(base))
+        return files
+
+    def open(self, service="all", since=None, until=None, tail="100", follow=False):
+        if follow:
+            raise RuntimeError("--follow needs the api or cli source")
+        start = iso_utc(since) if since else None
+        end = iso_utc(until) if until else None
+        count = None if tail in (None, "all") else int(tail)
+        producers = []
+        for container_id, name, number, directory in self.containers(None if service == "all" else service):
+            producers.append(self._producer(self.log_files(directory, container_id), f"{name}-{number}", start, end, count))
+        return LogStream(producers)
+
+    @staticmethod
+    def _producer(files, prefix, start, end, count):
+        def raw_lines():
+            if count is not None and not (start or end):
+                # Newest files first until we have enough lines, then replay them in order
+                chunks = []
+                for log_file in reversed(files):
+                    lines = log_file.tail_lines(count - sum(len(chunk) for chunk in chunks))
+                    chunks.append(lines)
+                    if sum(len(chunk) for chunk in chunks) >= count:
+                        break
+                for chunk in reversed(chunks):
+                    yield from chunk
+                return
+            windowed = windowed_lines()
+            # Like `docker logs`, the tail is taken from the lines inside the window
+            yield from windowed if count is None else deque(windowed, maxlen=count)
+
+        def windowed_lines():
+            for log_file in files:
+                if start and log_file is not files[-1] and log_file.modified_before(start):
+                    continue
+                yield from log_file.raw_lines(start, end)
+
+        def produce():
+            for raw in raw_lines():
+                if not raw.strip():
+                    continue
+                try:
+                    entry = json.loads(raw)
+                except ValueError:
+                    continue
+                yield f"{prefix}  | {normalize_stamp(entry.get('time', ''))} {entry.get('log', '').rstrip()}"
+
+        return produce
+
+def select_source(kind="auto", compose_file="docker-compose.yml", pool_size=4, docker_root=DOCKER_CONTAINERS_DIR):
+    if kind == "files":
+        return JsonFileSource(docker_root, compose_file=compose_file)
+    if kind in ("auto", "api"):
+        client = DockerClient(pool_size=pool_size)
+        try:
+            if client.available() and client.ping():
+                return DockerApiSource(client, compose_file=compose_file)
+        except (OSError, http.client.HTTPException):
+            pass
+        if kind == "api":
+            raise RuntimeError(f"Docker socket not reachable at {client.socket_path}")
+    return CliLogSource(compose_file)
+
+def split_container(line):
+    # Compose prefixes each line with a padded "<service>-<replica> | "
+    head, sep, message = line.partition("| ")
+    container = head.rstrip()
+    if not sep or not container or " " in container:
+        return None, None, line
+    name, dash, replica = container.rpartition("-")
+    if dash and replica.isdigit():
+        return container, name, message
+    return container, container, message
+
+def split_service(line):
+    _, service, message = split_container(line)
+    return service, message
+
+def split_timestamp(message):
+    # `--timestamps` puts an RFC 3339 stamp in front of every message
+    if len(message) > 20 and message[4] == "-" and message[10] == "T":
+        stamp, _, rest = message.partition(" ")
+        return stamp, rest
+    return None, message
+
+def pack_for(service):
+    if not service:
+        return None
+    name = service.lower()
+    for key in SERVICE_PACKS:
+        if key in name:
+            return key
+    for alias, key in PACK_ALIASES.items():
+        if alias in name:
+            return key
+    return None
+
+class LogMatcher:
+    """Classifies log lines in one pass with patterns compiled once per pack.
+
+    A line is lowercased once and gated on the pack's keyword tuple; only lines
+    that hit a keyword run the pack's combined regex, where every pattern is a
+    named group in a single alternation. When several patterns hit the same line
+    the most severe one wins, and at equal severity a pack pattern beats a base
+    one, so `Unable to connect to qBittorrent` in an [Error] line is reported as
+    download_client_unavailable rather than error. Each line is counted once.
+
+    The gate costs one substring check per keyword, so it is no faster than the
+    old five-pattern loop it replaced while checking about three times as many
+    keywords per line; bench_analyze_logs.py --matcher measures both.
+    """
+
+    def __init__(self, patterns=None, packs=None, ignore_case=True):
+        self.patterns = list(BASE_PATTERNS if patterns is None else patterns)
+        self.packs = SERVICE_PACKS if packs is None else packs
+        self.ignore_case = ignore_case
+        self._compiled = {}
+        self._by_service = {}
+
+    def _compile(self, pack):
+        # Pack patterns go first so they also win a tie at the same position
+        pack_entries = list(self.packs.get(pack, []))
+        entries = pack_entries + self.patterns
+        keywords = []
+        groups = {}
+        parts = []
+        for idx, entry in enumerate(entries):
+            if entry.severity not in SEVERITIES:
+                raise ValueError(f"Unknown severity '{entry.severity}' for pattern '{entry.name}'")
+            for keyword in entry.keywords:
+                keyword = keyword.lower() if self.ignore_case else keyword
+                if keyword not in keywords:
+                    keywords.append(keyword)
+            regex = entry.regex or "|".join(re.escape(k) for k in entry.keywords)
+            group = f"p{idx}"
+            groups[group] = (entry.name, entry.severity, (SEVERITIES.index(entry.severity), idx < len(pack_entries)))
+            parts.append(f"(?P<{group}>{regex})")
+        flags = re.IGNORECASE if self.ignore_case else 0
+        compiled = (tuple(keywords), re.compile("|".join(parts), flags), groups)
+        self._compiled[pack] = compiled
+        return compiled
+
+    def classify(self, message, service=None):
+        compiled = self._by_service.get(service)
+        if compiled is None:
+            pack = pack_for(service)
+            compiled = self._compiled.get(pack) or self._compile(pack)
+            self._by_service[service] = compiled
+        keywords, regex, groups = compiled
+        text = message.lower() if self.ignore_case else message
+        for keyword in keywords:
+            if keyword in text:
+                break
+        else:
+            return None
+        best = None
+        for match in regex.finditer(text):
+            hit = groups[match.lastgroup]
+            if best is None or hit[2] > best[2]:
+                best = hit
+                if hit[2] == (len(SEVERITIES) - 1, True):
+                    break
+        if best is None:
+            return None
+        return Finding(service, best[0], best[1])
+
+class RollingCounter:
+    """Per-key counts over sliding windows built from fixed-width time buckets.
+
+    Only buckets inside the longest window are kept, so memory is bounded by
+    the number of distinct keys times the number of buckets, however long the
+    process runs or however noisy a container gets.
+    """
+
+    def __init__(self, windows=ROLLING_WINDOWS, bucket_seconds=BUCKET_SECONDS):
+        self.windows = windows
+        self.bucket_seconds = bucket_seconds
+        self.horizon = max(seconds for _, seconds in windows)
+        self.buckets = deque()
+
+    def _bucket(self, now):
+        start = int(now // self.bucket_seconds) * self.bucket_seconds
+        if not self.buckets or self.buckets[-1][0] != start:
+            self.buckets.append((start, Counter()))
+            self._expire(now)
+        return self.buckets[-1][1]
+
+    def _expire(self, now):
+        oldest = now - self.horizon - self.bucket_seconds
+        while self.buckets and self.buckets[0][0] <= oldest:
+            self.buckets.popleft()
+
+    def add(self, key, now=None):
+        now = time.monotonic() if now is None else now
+        self._bucket(now)[key] += 1
+
+    def count(self, key, seconds, now=None):
+        now = time.monotonic() if now is None else now
+        cutoff = now - seconds
+        return sum(counts[key] for start, counts in reversed(self.buckets) if start + self.bucket_seconds > cutoff)
+
+    def totals(self, seconds, now=None):
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+        cutoff = now - seconds
+        totals = Counter()
+        for start, counts in self.buckets:
+            if start + self.bucket_seconds > cutoff:
+                totals.update(counts)
+        return totals
+
+class TraceEvent:
+    """One log event that may span several lines, e.g. a stack trace.
+
+    Only the opening line, the most severe matching line and the latest
+    non-indented line are kept, plus counters, so an open event costs the same
+    however long the trace gets.
+    """
+
+    __slots__ = ("service", "stamp", "line", "head", "finding", "best", "tail", "lines", "size", "python", "state", "touched", "truncated")
+
+    def __init__(self, service, stamp, line, message, finding, touched=0.0, state="open"):
+        self.service = service
+        self.stamp = stamp
+        self.line = line.strip()
+        self.head = message.strip()
+        self.finding = finding
+        self.best = self.head
+        self.tail = None
+        self.lines = 1
+        self.size = len(message)
+        self.python = message.startswith(TRACEBACK_HEAD)
+        self.state = "frames" if self.python else state
+        self.touched = touched
+        self.truncated = False
+
+    def accepts(self, message):
+        # Advances the state machine; False means the line starts a new event
+        first = message[:1]
+        if first == " " or first == "\t":
+            if self.state == "chained":
+                self.state = "frames"
+            return True
+        if self.python:
+            if not message:
+                return True
+            if self.state == "frames":
+                self.state = "raised" # the "ValueError: ..." line after the frames
+                return True
+            if message.startswith(PYTHON_CHAIN):
+                self.state = "frames" if message.startswith(TRACEBACK_HEAD) else "chained"
+                return True
+            return False
+        return message.startswith(TRACE_CONTINUATIONS)
+
+    def extend(self, message, finding):
+        self.lines += 1
+        self.size += len(message)
+        if message[:1] not in (" ", "\t") and message:
+            self.tail = message.strip()
+        if finding is not None and (self.finding is None or SEVERITIES.index(finding.severity) > SEVERITIES.index(self.finding.severity)):
+            self.finding = finding
+            self.best = message.strip()
+
+    @property
+    def message(self):
+        # What gets classified into templates: the opening line, plus the line
+        # that explains it when that is somewhere else in the trace
+        if self.python and self.tail:
+            return f"{self.head} ... {self.tail}"
+        if self.best != self.head:
+            return f"{self.head} ... {self.best}"
+        return self.head
+
+    @property
+    def text(self):
+        extra = f" (+{self.lines - 1} lines{', truncated' if self.truncated else ''})" if self.lines > 1 else ""
+        if self.python and self.tail:
+            return f"{self.line} ... {self.tail}{extra}"
+        return self.line + extra
+
+
+class MultilineStitcher:
+    """Per-container state machine that folds continuation lines into events.
+
+    A container gets an open event when a line matches a pattern. Indented
+    lines, "Caused by:" / "--- End of inner exception" markers and the parts
+    of a Python traceback are folded into it; any other line from that
+    container closes it. Events are cut at `max_lines`/`max_bytes` so a
+    container that indents everything cannot swallow its own errors.
+    """
+
+    def __init__(self, max_lines=MAX_EVENT_LINES, max_bytes=MAX_EVENT_BYTES):
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self.open = {} # container -> TraceEvent
+
+    def feed(self, container, service, stamp, line, message, finding, now=0.0):
+        # Returns the event this line closed, if any
+        event = self.open.get(container)
+        if event is not None:
+            if event.accepts(message):
+                if event.lines < self.max_lines and event.size + len(message) <= self.max_bytes:
+                    event.extend(message, finding)
+                    event.touched = now
+                    return None
+                event.truncated = True
+                self.open[container] = TraceEvent(service, stamp, line, message, finding, now, state=event.state)
+                return event
+            del self.open[container]
+        if finding is not None:
+            self.open[container] = TraceEvent(service, stamp, line, message, finding, now)
+        return event
+
+    def expire(self, before):
+        # Closes events that have not grown since `before` (monotonic seconds)
+        stale = [container for container, event in self.open.items() if event.touched < before]
+        return [self.open.pop(container) for container in stale]
+
+    def close(self):
+        events = list(self.open.values())
+        self.open.clear()
+        return events
+
+def time_ordered(lines, lookahead=TIMELINE_LOOKAHEAD):
+    # Sorts one stream inside a sliding window of `lookahead` lines; lines
+    # without a stamp (trace frames) inherit the previous one and keep their order
+    heap = []
+    stamp = ""
+    for seq, line in enumerate(lines):
+        _, message = split_service(line)
+        line_stamp, _ = split_timestamp(message)
+        if line_stamp:
+            stamp = normalize_stamp(line_stamp)
+        heapq.heappush(heap, (stamp, seq, line))
+        if len(heap) > lookahead:
+            yield heapq.heappop(heap)
+    while heap:
+        yield heapq.heappop(heap)
+
+class TimelineMerge:
+    """Lazy k-way merge of per-service log streams into one timeline.
+
+    Each stream is put in order within its lookahead window, then heapq.merge
+    keeps one pending line per stream, so memory is streams x lookahead lines
+    no matter how much history is read. Lines later than the window allows
+    are passed through and counted in `late`.
+    """
+
+    def __init__(self, streams, lookahead=TIMELINE_LOOKAHEAD):
+        self.streams = streams
+        self.lookahead = lookahead
+        self.late = 0
+
+    def __iter__(self):
+        last = ""
+        for stamp, _, line in heapq.merge(*(time_ordered(stream, self.lookahead) for stream in self.streams)):
+            if stamp < last:
+                self.late += 1
+            else:
+                last = stamp
+            yield line
+
+class BurstTracker:
+    """Buckets events from a time-ordered stream into 10 second slots.
+
+    A slot where at least `min_services` services log `min_findings` findings
+    between them is a correlated burst (a VPN drop taking the downloaders and
+    *arr apps with it). Events are added as they open, in timeline order, and
+    read back when the slot is flushed so a trace that was still growing
+    reports its most severe line. The slot is the first 18 characters of the
+    RFC 3339 stamp, so only the open slot is held in memory.
+    """
+
+    def __init__(self, on_bucket=None, min_services=BURST_MIN_SERVICES, min_findings=BURST_MIN_FINDINGS):
+        self.on_bucket = on_bucket
+        self.min_services = min_services
+        self.min_findings = min_findings
+        self.bucket = None
+        self.entries = {} # service -> [count, first event, most severe event]
+        self.bursts = deque(maxlen=MAX_BURSTS)
+        self.burst_count = 0
+
+    def add(self, event):
+        if not event.stamp or event.finding is None:
+            return
+        bucket = event.stamp[:18]
+        if bucket != self.bucket:
+            self.flush()
+            self.bucket = bucket
+        service = event.finding.service
+        entry = self.entries.get(service)
+        if entry is None:
+            self.entries[service] = [1, event, event]
+            return
+        entry[0] += 1
+        if SEVERITIES.index(event.finding.severity) > SEVERITIES.index(entry[2].finding.severity):
+            entry[2] = event
+
+    def flush(self):
+        if not self.entries:
+            return
+        start = f"{self.bucket}0Z"
+        rows = sorted((
+            {"service": service, "count": count, "pattern": best.finding.pattern, "severity": best.finding.severity,
+             "first_seen": first.stamp, "message": best.message}
+            for service, (count, first, best) in self.entries.items()
+        ), key=lambda row: row["first_seen"])
+        total = sum(row["count"] for row in rows)
+        burst = len(rows) >= self.min_services and total >= self.min_findings
+        if burst:
+            self.burst_count += 1
+            self.bursts.append({"start": start, "findings": total, "services": [row["service"] for row in rows]})
+        if self.on_bucket:
+            self.on_bucket(start, rows, burst)
+        self.entries = {}
+
+class Template:
+    __slots__ = ("service", "tokens", "severity", "count", "first_seen", "last_seen", "example")
+
+    def __init__(self, service, tokens, severity, stamp, example):
+        self.service = service
+        self.tokens = tokens
+        self.severity = severity
+        self.count = 0
+        self.first_seen = stamp
+        self.last_seen = stamp
+        self.example = example
 
-    error_patterns = ["Error", "Exception", "Fatal", "Panic", "Unauthorized"]
-    
-    findings = []
-    for line in logs.splitlines():
-        for pattern in error_patterns:
-            if pattern in line:
-                findings.append(line)
-
-    if findings:
-        print(f"\n⚠️  Found {len(findings)} potential issues:")
-        # Simple deduplication and summary
-        unique_findings = list(set(findings))[:10] # Show top 10 unique
-        for f in unique_findings:
-            print(f" - {f.strip()}")
-            
-        compose_cmd = "docker compose" if cmd[:2] == ["docker", "compose"] else "docker-compose"
-        print(f"\n💡 Recommendation: Check the lines above. Use '{compose_cmd} logs <service>' for more details.")
+    @property
+    def text(self):
+        return " ".join(self.tokens)
+
+    def to_dict(self):
+        return {
+            "service": self.service,
+            "severity": self.severity,
+            "count": self.count,
+            "template": self.text,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "example": self.example,
+        }
+
+    def touch(self, severity, stamp, count=1):
+        self.count += count
+        if SEVERITIES.index(severity) > SEVERITIES.index(self.severity):
+            self.severity = severity
+        if stamp:
+            if not self.first_seen or stamp < self.first_seen:
+                self.first_seen = stamp
+            if not self.last_seen or stamp > self.last_seen:
+                self.last_seen = stamp
+
+def mask_message(message):
+    for regex, token in TEMPLATE_MASKS:
+        message = regex.sub(token, message)
+    return message
+
+class SpaceSaving:
+    """Space-saving top-k counter with a fixed number of slots.
+
+    A key that is not tracked replaces the smallest counter and inherits its
+    count, which is kept as that key's error bound. Any key seen more than
+    total / capacity times is guaranteed to be tracked, and no count is
+    over-estimated by more than its error.
+    """
+
+    __slots__ = ("capacity", "counts", "errors", "total")
+
+    def __init__(self, capacity=TOP_K):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.total = 0
+
+    def add(self, key, count=1, error=0):
+        self.total += count
+        counts = self.counts
+        if key in counts:
+            counts[key] += count
+            self.errors[key] += error
+        elif len(counts) < self.capacity:
+            counts[key] = count
+            self.errors[key] = error
+        else:
+            victim = min(counts, key=counts.get)
+            floor = counts.pop(victim)
+            del self.errors[victim]
+            counts[key] = floor + count
+            self.errors[key] = floor + error
+
+    def merge(self, other):
+        for key, count in other.counts.items():
+            self.add(key, count, other.errors[key])
+        self.total += other.total - sum(other.counts.values())
+        return self
+
+    def top(self, limit=MAX_SAMPLES):
+        ranked = sorted(self.counts.items(), key=lambda item: -item[1])[:limit]
+        return [(key, count, self.errors[key]) for key, count in ranked]
+
+def minute_of(stamp):
+    # "2025-12-20T01:02..." -> minutes since the epoch
+    try:
+        return int(datetime.fromisoformat(stamp[:16]).replace(tzinfo=timezone.utc).timestamp()) // 60
+    except ValueError:
+        return None
+
+class ErrorRateHistogram:
+    """Per-minute line and error counts in a fixed ring.
+
+    Minute m lives in slot m % size, so memory is three flat arrays however
+    long the window is; minutes older than the ring are overwritten or, when
+    they arrive late, dropped.
+    """
+
+    __slots__ = ("size", "minutes", "lines", "errors", "_prefix", "_slot")
+
+    def __init__(self, size=HISTOGRAM_MINUTES):
+        self.size = size
+        self.minutes = array("q", [-1]) * size
+        self.lines = array("I", [0]) * size
+        self.errors = array("I", [0]) * size
+        self._prefix = None
+        self._slot = None
+
+    def _locate(self, minute):
+        slot = minute % self.size
+        if self.minutes[slot] != minute:
+            if self.minutes[slot] > minute:
+                return None
+            self.minutes[slot] = minute
+            self.lines[slot] = self.errors[slot] = 0
+        return slot
+
+    def add(self, stamp, lines=0, errors=0):
+        prefix = stamp[:16]
+        if prefix != self._prefix:
+            minute = minute_of(prefix)
+            self._prefix = prefix
+            self._slot = None if minute is None else self._locate(minute)
+        slot = self._slot
+        if slot is not None:
+            self.lines[slot] += lines
+            self.errors[slot] += errors
+
+    def merge(self, other):
+        self._prefix = None
+        for slot, minute in enumerate(other.minutes):
+            if minute < 0:
+                continue
+            target = self._locate(minute)
+            if target is not None:
+                self.lines[target] += other.lines[slot]
+                self.errors[target] += other.errors[slot]
+        return self
+
+    def get(self, minute):
+        slot = minute % self.size
+        if self.minutes[slot] != minute:
+            return 0, 0
+        return self.lines[slot], self.errors[slot]
+
+    def series(self):
+        # (minute, lines, errors) oldest first, with empty minutes filled in
+        used = sorted((minute, slot) for slot, minute in enumerate(self.minutes) if minute >= 0)
+        if not used:
+            return
+        occupied = dict(used)
+        for minute in range(used[0][0], used[-1][0] + 1):
+            slot = occupied.get(minute)
+            yield (minute, 0, 0) if slot is None else (minute, self.lines[slot], self.errors[slot])
+
+    def spikes(self, min_errors=SPIKE_MIN_ERRORS, factor=SPIKE_FACTOR, alpha=SPIKE_ALPHA):
+        # Minutes whose error count jumps well above an exponential moving average
+        found = []
+        baseline = None
+        for minute, _, errors in self.series():
+            if baseline is not None and errors >= min_errors and errors >= factor * max(baseline, 1.0):
+                found.append((minute, errors, baseline))
+            baseline = errors if baseline is None else baseline + alpha * (errors - baseline)
+        return found
+
+    def summary(self):
+        minutes = lines = errors = peak_lines = peak_errors = 0
+        for _, minute_lines, minute_errors in self.series():
+            minutes += 1
+            lines += minute_lines
+            errors += minute_errors
+            peak_lines = max(peak_lines, minute_lines)
+            peak_errors = max(peak_errors, minute_errors)
+        return {"minutes": minutes, "lines": lines, "errors": errors, "peak_lines": peak_lines, "peak_errors": peak_errors}
+
+    def error_summary(self):
+        summary = self.summary()
+        return {"minutes": summary["minutes"], "errors": summary["errors"], "peak": summary["peak_errors"]}
+
+def format_minute(minute):
+    return datetime.fromtimestamp(minute * 60, timezone.utc).strftime("%Y-%m-%dT%H:%MZ")
+
+class TemplateMiner:
+    """Online Drain-style grouping of log lines into templates.
+
+    Variable tokens are masked, then lines are bucketed by service, token count
+    and first token. Within a bucket a line joins the most similar template
+    (share of positions with equal tokens) if it clears the threshold, turning
+    the positions that differ into wildcards; otherwise it starts a new
+    template. Each line costs one bucket lookup plus a comparison against at
+    most `max_children` templates, and the table is capped at `max_templates`
+    by evicting the least recently seen template.
+    """
+
+    def __init__(self, max_templates=MAX_TEMPLATES, similarity=0.5, max_children=64):
+        self.max_templates = max_templates
+        self.similarity = similarity
+        self.max_children = max_children
+        self.buckets = {}
+        self.templates = OrderedDict() # id -> Template, least recently seen first
+        self.evicted = 0
+
+    def __setstate__(self, state):
+        # Templates are keyed by id(); rebuild the keys after unpickling
+        self.__dict__.update(state)
+        self.templates = OrderedDict((id(template), template) for template in self.templates.values())
+
+    def _key(self, service, tokens):
+        head = tokens[0] if tokens else ""
+        if "<" in head:
+            head = WILDCARD
+        return (service, len(tokens), head)
+
+    def _best(self, candidates, tokens):
+        best, best_score = None, -1.0
+        for template in candidates:
+            same = sum(1 for a, b in zip(template.tokens, tokens) if a == b or a == WILDCARD)
+            score = same / len(tokens) if tokens else 1.0
+            if score > best_score:
+                best, best_score = template, score
+        return best, best_score
+
+    def add(self, service, message, severity, stamp=None, count=1, tokens=None):
+        # Returns (template, is_new)
+        tokens = mask_message(message).split() if tokens is None else tokens
+        key = self._key(service, tokens)
+        candidates = self.buckets.setdefault(key, [])
+        template, score = self._best(candidates, tokens)
+        is_new = template is None or score < self.similarity
+        if is_new:
+            template = Template(service, tokens, severity, stamp, message.strip())
+            if len(candidates) >= self.max_children:
+                self._evict(candidates[0])
+            candidates.append(template)
+            self.templates[id(template)] = template
+            if len(self.templates) > self.max_templates:
+                self._evict(next(iter(self.templates.values())))
+        else:
+            template.tokens = [a if a == b else WILDCARD for a, b in zip(template.tokens, tokens)]
+            self.templates.move_to_end(id(template))
+        template.touch(severity, stamp, count)
+        return template, is_new
+
+    def _evict(self, template):
+        self.templates.pop(id(template), None)
+        key = self._key(template.service, template.tokens)
+        bucket = self.buckets.get(key, [])
+        if template in bucket:
+            bucket.remove(template)
+            if not bucket:
+                del self.buckets[key]
+        self.evicted += 1
+
+    def merge(self, other):
+        for template in other.templates.values():
+            merged, _ = self.add(template.service, template.text, template.severity, template.first_seen, template.count)
+            merged.touch(template.severity, template.last_seen, 0)
+            if merged.count == template.count:
+                merged.example = template.example
+        self.evicted += other.evicted
+        return self
+
+    def top(self, limit=MAX_SAMPLES, service=None):
+        templates = [t for t in self.templates.values() if service is None or t.service == service]
+        return sorted(templates, key=lambda t: (-SEVERITIES.index(t.severity), -t.count))[:limit]
+
+class ScanResult:
+    """Counts, mined templates and a few sample lines for one scan (or one service)."""
+
+    def __init__(self, max_samples=MAX_SAMPLES):
+        self.max_samples = max_samples
+        self.lines = 0
+        self.total = 0
+        self.by_severity = Counter()
+        self.by_service = Counter()
+        self.by_pattern = Counter()
+        self.by_service_severity = Counter()
+        self.by_service_pattern = Counter()
+        self.templates = TemplateMiner()
+        self.heavy = {} # service -> SpaceSaving of masked messages
+        self.rates = {} # service -> ErrorRateHistogram of errors per minute
+        self.volume = ErrorRateHistogram() # lines and errors per minute, all services
+        self.samples = []
+
+    def rate(self, service):
+        histogram = self.rates.get(service)
+        if histogram is None:
+            histogram = self.rates[service] = ErrorRateHistogram()
+        return histogram
+
+    def add(self, finding, message, stamp=None, line=None):
+        # Returns True when the line started a new template
+        self.total += 1
+        self.by_severity[finding.severity] += 1
+        self.by_service[finding.service] += 1
+        self.by_pattern[finding.pattern] += 1
+        self.by_service_severity[(finding.service, finding.severity)] += 1
+        self.by_service_pattern[(finding.service, finding.pattern)] += 1
+        heavy = self.heavy.get(finding.service)
+        if heavy is None:
+            heavy = self.heavy[finding.service] = SpaceSaving()
+        tokens = mask_message(message).split()
+        heavy.add(" ".join(tokens))
+        if stamp and finding.severity != "warning":
+            self.rate(finding.service).add(stamp, errors=1)
+            self.volume.add(stamp, errors=1)
+        _, is_new = self.templates.add(finding.service, message, finding.severity, stamp, tokens=tokens)
+        if is_new and len(self.samples) < self.max_samples:
+            self.samples.append(finding_dict(finding, stamp, line if line is not None else message))
+        return is_new
+
+    def merge(self, other):
+        self.lines += other.lines
+        self.total += other.total
+        self.by_severity.update(other.by_severity)
+        self.by_service.update(other.by_service)
+        self.by_pattern.update(other.by_pattern)
+        self.by_service_severity.update(other.by_service_severity)
+        self.by_service_pattern.update(other.by_service_pattern)
+        self.templates.merge(other.templates)
+        for service, heavy in other.heavy.items():
+            if service in self.heavy:
+                self.heavy[service].merge(heavy)
+            else:
+                self.heavy[service] = heavy
+        for service, histogram in other.rates.items():
+            if service in self.rates:
+                self.rates[service].merge(histogram)
+            else:
+                self.rates[service] = histogram
+        self.volume.merge(other.volume)
+        self.samples.extend(other.samples[:max(0, self.max_samples - len(self.samples))])
+        return self
+
+    def severity_summary(self):
+        return ", ".join(f"{sev} {self.by_severity[sev]}" for sev in reversed(SEVERITIES) if self.by_severity[sev])
+
+    def heavy_hitters(self, limit=MAX_SAMPLES):
+        # (service, message, count, error) across services, most frequent first
+        ranked = [(service, *entry) for service, heavy in self.heavy.items() for entry in heavy.top(limit)]
+        return sorted(ranked, key=lambda item: -item[2])[:limit]
+
+    def spikes(self):
+        # (service, minute, lines in that minute across services, errors, baseline)
+        found = [
+            (service, minute, self.volume.get(minute)[0], errors, baseline)
+            for service, histogram in self.rates.items()
+            for minute, errors, baseline in histogram.spikes()
+        ]
+        return sorted(found, key=lambda item: (item[1], str(item[0])))
+
+    def to_dict(self, template_limit=MAX_SAMPLES):
+        services = {}
+        for service, count in sorted(self.by_service.items(), key=lambda item: (-item[1], str(item[0]))):
+            services[service or "-"] = {
+                "findings": count,
+                "severity": {sev: self.by_service_severity[(service, sev)] for sev in SEVERITIES},
+                "patterns": {name: n for (svc, name), n in self.by_service_pattern.most_common() if svc == service},
+                "heavy_hitters": [
+                    {"message": message, "count": n, "error": error}
+                    for message, n, error in (self.heavy[service].top(template_limit) if service in self.heavy else [])
+                ],
+                "errors_per_minute": self.rates[service].error_summary() if service in self.rates else None,
+            }
+        return {
+            "lines_scanned": self.lines,
+            "findings": self.total,
+            "severity": {sev: self.by_severity[sev] for sev in SEVERITIES},
+            "patterns": dict(self.by_pattern.most_common()),
+            "services": services,
+            "templates": [template.to_dict() for template in self.templates.top(template_limit)],
+            "templates_total": len(self.templates.templates),
+            "templates_evicted": self.templates.evicted,
+            "samples": list(self.samples),
+            "volume": self.volume.summary(),
+            "spikes": [
+                {"service": service, "minute": format_minute(minute), "lines": lines, "errors": errors, "baseline": round(baseline, 2)}
+                for service, minute, lines, errors, baseline in self.spikes()
+            ],
+        }
+
+def finding_dict(finding, stamp, line):
+    return {
+        "service": finding.service,
+        "severity": finding.severity,
+        "pattern": finding.pattern,
+        "timestamp": stamp,
+        "line": line.strip(),
+    }
+
+def utc_now():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+_emit_lock = threading.Lock()
+
+def emit_event(kind, **fields):
+    # One self-describing JSON object per line, flushed so consumers see it immediately
+    event = {"schema": EVENT_SCHEMA, "type": kind, "time": utc_now()}
+    event.update(fields)
+    with _emit_lock:
+        sys.stdout.write(json.dumps(event, default=str) + "\n")
+        sys.stdout.flush()
+
+def scan_lines(lines, matcher, default_service=None, result=None, on_sample=None, archive=None, on_event=None):
+    result = ScanResult() if result is None else result
+    stitcher = MultilineStitcher()
+    open_events = stitcher.open
+    volume = result.volume
+    minute, mark = "\0", result.lines
+
+    def record(event):
+        finding = event.finding
+        if finding is None:
+            return
+        if result.add(finding, event.message, event.stamp, event.text) and on_sample:
+            on_sample(event.text, finding, event.stamp)
+
+    for line in lines:
+        result.lines += 1
+        container, service, message = split_container(line)
+        stamp, message = split_timestamp(message)
+        service = service or default_service
+        finding = matcher.classify(message, service)
+        if archive is not None:
+            archive.add(stamp, service, message, finding)
+        if stamp and not stamp.startswith(minute):
+            # Line volume is booked per minute in one go rather than per line
+            if result.lines - 1 > mark and minute != "\0":
+                volume.add(minute, lines=result.lines - 1 - mark)
+            minute, mark = stamp[:16], result.lines - 1
+        # Most lines neither match nor follow an open event; skip the stitcher for those
+        if finding is None and container not in open_events:
+            continue
+        closed = stitcher.feed(container, service, stamp, line, message, finding)
+        if closed is not None:
+            record(closed)
+        if on_event is not None:
+            # Reported as the event opens, in line order; events only close when
+            # their container logs again, which can be much later
+            opened = open_events.get(container)
+            if opened is not None and opened.lines == 1 and opened.finding is not None:
+                on_event(opened)
+    for event in stitcher.close():
+        record(event)
+    if minute != "\0" and result.lines > mark:
+        volume.add(minute, lines=result.lines - mark)
+    return result
+
+def list_services(compose_file="docker-compose.yml"):
+    # Top-level keys of the `services:` block; enough for our compose files
+    # without pulling in a YAML parser
+    services = []
+    in_services = False
+    try:
+        with open(compose_file, "r") as f:
+            for raw in f:
+                line = raw.rstrip()
+                if not line or line.lstrip().startswith("#"):
+                    continue
+                if not line[0].isspace():
+                    in_services = line.split("#")[0].strip() == "services:"
+                    continue
+                if in_services and line.startswith("  ") and not line[2].isspace() and line.endswith(":"):
+                    services.append(line.strip()[:-1].strip("\"'"))
+    except OSError:
+        pass
+    return services
+
+def iso_utc(value):
+    # Same fixed-width form Docker uses for log timestamps, so strings compare in time order
+    stamp = datetime.fromtimestamp(to_unix_time(value), timezone.utc)
+    return stamp.strftime("%Y-%m-%dT%H:%M:%S.%f000Z")
+
+class LogArchive:
+    """On-disk archive of ingested log lines in SQLite, partitioned by day and service.
+
+    Each partition is `<day>/<service>.db`, holding a `logs` table indexed by
+    time plus an FTS5 index over the message, so a search only opens the
+    partitions its time range and service select and hits indexes instead of
+    re-fetching logs. Rows are buffered and written in batched transactions;
+    day directories older than the retention window are deleted when the
+    archive is opened and again whenever a flush sees the date change, so a
+    --follow left running for days stays within it.
+    """
+
+    SCHEMA = [
+        "CREATE TABLE IF NOT EXISTS logs (id INTEGER PRIMARY KEY, ts TEXT NOT NULL,"
+        " level INTEGER NOT NULL, pattern TEXT, message TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS logs_ts ON logs (ts)",
+    ]
+    # Filled per batch with INSERT ... SELECT, about 3x faster than a per-row trigger
+    FTS_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts USING fts5(message, content='logs', content_rowid='id', columnsize=0)"
+    # Partitions kept open at once; a backfill can touch days x services of them
+    MAX_OPEN = 64
+
+    def __init__(self, root=DEFAULT_ARCHIVE_DIR, retention_days=ARCHIVE_RETENTION_DAYS, batch_size=ARCHIVE_BATCH_SIZE):
+        self.root = root
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.pending = []
+        self.connections = OrderedDict() # (day, service) -> (connection, has_fts), least recently used first
+        self.written = 0
+        self.cutoff = "" # Oldest day kept; rows older than this are not written
+        self.expired_on = None
+        os.makedirs(root, exist_ok=True)
+        if retention_days:
+            self.expire()
+
+    @staticmethod
+    def _filename(service):
+        # Compose service names are already safe; anything else is squashed
+        return re.sub(r"[^A-Za-z0-9_.-]", "_", service).lstrip(".") + ".db"
+
+    def days(self):
+        return sorted(name for name in os.listdir(self.root) if len(name) == 10 and os.path.isdir(os.path.join(self.root, name)))
+
+    def services(self, day):
+        # Partition files of one day; the name minus ".db" is the service
+        return sorted(name for name in os.listdir(os.path.join(self.root, day)) if name.endswith(".db"))
+
+    def expire(self, today=None):
+        today = today or datetime.now(timezone.utc).date()
+        self.expired_on = today
+        self.cutoff = cutoff = (today - timedelta(days=self.retention_days)).isoformat()
+        for key in [key for key in self.connections if key[0] < cutoff]:
+            self.connections.pop(key)[0].close()
+        for day in self.days():
+            if day < cutoff:
+                shutil.rmtree(os.path.join(self.root, day), ignore_errors=True)
+
+    def _connect(self, day, filename, create=False):
+        key = (day, filename)
+        entry = self.connections.get(key)
+        if entry is not None:
+            self.connections.move_to_end(key)
+            return entry
+        if create:
+            os.makedirs(os.path.join(self.root, day), exist_ok=True)
+        conn = sqlite3.connect(os.path.join(self.root, day, filename), check_same_thread=False)
+        if create:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+            try:
+                conn.execute(self.FTS_SCHEMA)
+            except sqlite3.OperationalError:
+                pass # SQLite built without FTS5; search falls back to LIKE
+            conn.commit()
+        has_fts = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'logs_fts'").fetchone() is not None
+        self.connections[key] = entry = (conn, has_fts)
+        while len(self.connections) > self.MAX_OPEN:
+            self.connections.popitem(last=False)[1][0].close()
+        return entry
+
+    def add(self, stamp, service, message, finding=None):
+        stamp = stamp or datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f000Z")
+        level = SEVERITIES.index(finding.severity) + 1 if finding else 0
+        row = (stamp, service or "-", level, finding.pattern if finding else None, message)
+        with self.lock:
+            self.pending.append(row)
+            if len(self.pending) >= self.batch_size:
+                self._flush()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        if self.retention_days:
+            today = datetime.now(timezone.utc).date()
+            if today != self.expired_on:
+                self.expire(today)
+        if not self.pending:
+            return
+        partitions = {}
+        for ts, service, level, pattern, message in self.pending:
+            partitions.setdefault((ts[:10], service), []).append((ts, level, pattern, message))
+        for (day, service), rows in partitions.items():
+            if day < self.cutoff:
+                continue # Already past retention; it would only be deleted again
+            conn, has_fts = self._connect(day, self._filename(service), create=True)
+            with conn:
+                last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM logs").fetchone()[0]
+                conn.executemany("INSERT INTO logs (ts, level, pattern, message) VALUES (?, ?, ?, ?)", rows)
+                if has_fts:
+                    conn.execute("INSERT INTO logs_fts (rowid, message) SELECT id, message FROM logs WHERE id > ?", (last_id,))
+            self.written += len(rows)
+        self.pending = []
+
+    def close(self):
+        self.flush()
+        for conn, _ in self.connections.values():
+            conn.close()
+        self.connections = OrderedDict()
+
+    def search(self, pattern=None, service=None, since=None, until=None, severity=None, limit=50):
+        start = iso_utc(since) if since else None
+        end = iso_utc(until) if until else None
+        clauses, params = [], []
+        if start:
+            clauses.append("ts >= ?")
+            params.append(start)
+        if end:
+            clauses.append("ts <= ?")
+            params.append(end)
+        if severity:
+            clauses.append("level >= ?")
+            params.append(SEVERITIES.index(severity) + 1)
+        only = self._filename(service) if service and service != "all" else None
+        results = []
+        # Newest day first so the limit keeps the most recent matches
+        for day in reversed(self.days()):
+            if (start and day < start[:10]) or (end and day > end[:10]):
+                continue
+            rows = []
+            for filename in [only] if only else self.services(day):
+                if not os.path.exists(os.path.join(self.root, day, filename)):
+                    continue
+                conn, has_fts = self._connect(day, filename)
+                where, values = list(clauses), list(params)
+                if pattern:
+                    if has_fts:
+                        where.append("id IN (SELECT rowid FROM logs_fts WHERE logs_fts MATCH ?)")
+                        values.append(" ".join('"' + token.replace('"', '""') + '"' for token in pattern.split()))
+                    else:
+                        where.append("message LIKE ?")
+                        values.append(f"%{pattern}%")
+                sql = " WHERE " + " AND ".join(where) if where else ""
+                values.append(limit - len(results))
+                name = filename[:-3]
+                query = f"SELECT ts, ?, level, pattern, message FROM logs{sql} ORDER BY ts DESC LIMIT ?"
+                rows.extend(conn.execute(query, [name] + values).fetchall())
+            # Each partition returned its newest rows; merge them for the day
+            rows.sort(key=lambda row: row[0], reverse=True)
+            results.extend(rows[:limit - len(results)])
+            if len(results) >= limit:
+                break
+        return results
+
+def search_archive(pattern=None, service="all", since=None, until=None, severity=None, limit=50,
+                   archive_dir=DEFAULT_ARCHIVE_DIR, output="text"):
+    if not os.path.isdir(archive_dir):
+        message = f"No log archive at {archive_dir} (run with --archive first)"
+        if output == "text":
+            print(f"❌ {message}")
+        elif output == "json":
+            print(json.dumps({"schema": REPORT_SCHEMA, "error": message}))
+        else:
+            emit_event("error", error=message)
+        return None
+    archive = LogArchive(archive_dir, retention_days=0)
+    started = time.perf_counter()
+    try:
+        rows = archive.search(pattern, service=service, since=since, until=until, severity=severity, limit=limit)
+    finally:
+        archive.close()
+    elapsed = (time.perf_counter() - started) * 1000
+    matches = [
+        {
+            "timestamp": stamp,
+            "service": row_service,
+            "severity": SEVERITIES[level - 1] if level else None,
+            "pattern": pattern_name,
+            "message": message,
+        }
+        for stamp, row_service, level, pattern_name, message in reversed(rows)
+    ]
+    if output == "json":
+        print(json.dumps({"schema": REPORT_SCHEMA, "query": pattern, "service": service, "matches": matches,
+                          "elapsed_ms": round(elapsed, 2)}, indent=2))
+    elif output == "ndjson":
+        for match in matches:
+            emit_event("match", **match)
+        emit_event("summary", matches=len(matches), elapsed_ms=round(elapsed, 2))
     else:
+        for match in matches:
+            label = f"[{match['severity']}] " if match["severity"] else ""
+            print(f"{match['timestamp']} {match['service']:<14} {label}{match['message']}")
+        print(f"\n🔎 {len(matches)} matching lines in {elapsed:.1f} ms")
+    return matches
+
+class CursorStore:
+    """Last processed log position per service, persisted as JSON.
+
+    Cursors are keyed by compose service and hold a log timestamp rather than a
+    container ID or byte offset, so they stay valid when containers restart or
+    get recreated. Docker's --since is inclusive, so each cursor also keeps
+    digests of the lines already seen at exactly that timestamp.
+    """
+
+    def __init__(self, path=DEFAULT_STATE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.cursors = {}
+        try:
+            with open(path, "r") as f:
+                self.cursors = json.load(f).get("cursors", {})
+        except (OSError, ValueError):
+            pass
+
+    def get(self, service):
+        with self.lock:
+            return dict(self.cursors.get(service) or {})
+
+    def update(self, service, cursor):
+        if not cursor.get("timestamp"):
+            return
+        with self.lock:
+            self.cursors[service] = dict(cursor, updated=datetime.now().astimezone().isoformat(timespec="seconds"))
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with self.lock:
+            with open(tmp, "w") as f:
+                json.dump({"version": 1, "cursors": self.cursors}, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+def line_digest(message):
+    return hashlib.blake2b(message.encode("utf-8", "replace"), digest_size=8).hexdigest()
+
+def track_cursor(lines, cursor):
+    # Drops lines the cursor has already covered and advances it in place as lines pass
+    last = cursor.get("timestamp")
+    seen = set(cursor.get("seen", []))
+    try:
+        for line in lines:
+            _, message = split_service(line)
+            stamp, _ = split_timestamp(message)
+            if stamp:
+                if last and stamp < last:
+                    continue
+                digest = line_digest(message)
+                if stamp == last:
+                    if digest in seen:
+                        continue
+                    if len(seen) < MAX_CURSOR_DIGESTS:
+                        seen.add(digest)
+                else:
+                    last, seen = stamp, {digest}
+            yield line
+    finally:
+        cursor["timestamp"] = last
+        cursor["seen"] = sorted(seen)
+
+def collect_per_service(source, services, since=None, until=None, tail="100", jobs=16, on_sample=None, cursors=None, archive=None):
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    # Each worker streams one service; the pool size caps concurrent log readers
+    def scan_service(service):
+        cursor = cursors.get(service) if cursors is not None else None
+        if cursor and cursor.get("timestamp"):
+            # Resume right where the last run stopped, however many lines that is
+            stream = source.open(service, since=cursor["timestamp"], until=until, tail="all")
+        else:
+            stream = source.open(service, since=since, until=until, tail=tail)
+        try:
+            if cursor is None:
+                return scan_lines(stream, LogMatcher(), default_service=service, on_sample=on_sample, archive=archive)
+            lines = track_cursor(stream, cursor)
+            result = scan_lines(lines, LogMatcher(), default_service=service, on_sample=on_sample, archive=archive)
+            lines.close()
+        finally:
+            stream.close()
+        cursors.update(service, cursor)
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = {pool.submit(scan_service, service): service for service in services}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+def scan_timeline(source, services, since=None, until=None, tail="100", lookahead=TIMELINE_LOOKAHEAD, output="text",
+                  on_sample=None, archive=None):
+    # One chronological pass over all services, reporting findings per 10s bucket as they close
+    def on_bucket(start, rows, burst):
+        if output == "ndjson":
+            emit_event("timeline", start=start, burst=burst, services=rows)
+        elif output == "text":
+            print_bucket(start, rows, burst)
+
+    if output == "text":
+        print(f"🕒 Findings in 10s buckets (🔥 = {BURST_MIN_SERVICES}+ services failing together):")
+    streams = []
+    try:
+        for service in services:
+            streams.append(source.open(service, since=since, until=until, tail=tail))
+        merged = TimelineMerge(streams, lookahead)
+        tracker = BurstTracker(on_bucket)
+        result = scan_lines(merged, LogMatcher(), on_sample=on_sample, archive=archive, on_event=tracker.add)
+        tracker.flush()
+    finally:
+        for stream in streams:
+            stream.close()
+    return result, merged, tracker
+
+def is_log_name(name):
+    base = os.path.basename(name)
+    if base.startswith("._"): # macOS AppleDouble files inside tarballs
+        return False
+    return base.endswith((".log", ".log.gz", ".txt", ".txt.gz")) or ".log." in base or "/logs/" in f"/{name}"
+
+def history_paths(paths):
+    # Files as given, plus log files and tarballs found under directories
+    found = []
+    for path in paths:
+        if not os.path.isdir(path):
+            found.append(path)
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                full = os.path.join(root, name)
+                if name.endswith(HISTORY_TAR_SUFFIXES) or is_log_name(full):
+                    found.append(full)
+    return found
+
+def history_service(name):
+    # sonarr.log.2.gz -> sonarr; <container id>-json.log.1 -> the short id
+    base = ROTATION_SUFFIX.sub("", os.path.basename(name))
+    if base.endswith("-json"):
+        return base[:-5][:12]
+    return base or None
+
+def open_history(path):
+    # Yields (name, binary stream) for every log inside `path`
+    if path.endswith(HISTORY_TAR_SUFFIXES):
+        # Stream mode reads the tarball once, front to back, without seeking
+        with tarfile.open(path, "r|*") as tar:
+            for member in tar:
+                if not member.isfile() or not is_log_name(member.name):
+                    continue
+                f = tar.extractfile(member)
+                yield member.name, gzip.GzipFile(fileobj=f) if member.name.endswith(".gz") else f
+        return
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        yield path, f
+
+def history_lines(f, since=None, until=None):
+    for raw in f:
+        if raw.startswith(b"{") and b'"log"' in raw:
+            # docker json-file entry
+            try:
+                entry = json.loads(raw)
+            except ValueError:
+                continue
+            line = f"{normalize_stamp(entry.get('time', ''))} {entry.get('log', '').rstrip()}"
+        else:
+            line = raw.decode("utf-8", "replace").rstrip("\r\n")
+        if since or until:
+            _, message = split_service(line)
+            stamp, _ = split_timestamp(message)
+            if stamp:
+                stamp = normalize_stamp(stamp)
+                if (since and stamp < since) or (until and stamp > until):
+                    continue
+        yield line
+
+def scan_history_file(path, since=None, until=None, service=None):
+    # Runs in a worker process; the ScanResult is pickled back to the parent
+    result = ScanResult()
+    matcher = LogMatcher()
+    logs = 0
+    for name, f in open_history(path):
+        logs += 1
+        default_service = history_service(name)
+        lines = history_lines(f, since, until)
+        if service:
+            # A compose-prefixed line names its own service; otherwise the file does
+            lines = (line for line in lines if (split_service(line)[0] or default_service) == service)
+        scan_lines(lines, matcher, default_service=default_service, result=result)
+    return result, logs
+
+def scan_history(paths, since=None, until=None, jobs=None, output="text", service=None):
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    files = history_paths(paths)
+    if not files:
+        raise FileNotFoundError(f"no log files found in {', '.join(paths)}")
+    since = iso_utc(since) if since else None
+    until = iso_utc(until) if until else None
+    workers = max(1, min(jobs or os.cpu_count() or 1, os.cpu_count() or 1, len(files)))
+    if output == "text":
+        print(f"📦 Scanning {len(files)} files with {workers} worker processes...", flush=True)
+    result = ScanResult()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(scan_history_file, path, since, until, service): path for path in files}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                file_result, logs = future.result()
+            except Exception as e:
+                # One corrupt archive shouldn't sink a week of history
+                if output == "text":
+                    print(f"   ⚠️  {path}: {e}", flush=True)
+                elif output == "ndjson":
+                    emit_event("error", path=path, error=str(e))
+                continue
+            result.merge(file_result)
+            if output == "text":
+                print(f"   {path}: {file_result.lines:,} lines in {logs} logs, {file_result.total} findings", flush=True)
+            elif output == "ndjson":
+                emit_event("file", path=path, logs=logs, **file_result.to_dict(template_limit=3))
+    return result
+
+def print_templates(templates, indent=" "):
+    for template in templates:
+        print(f"{indent}- [{template.severity}] {template.count}x {template.service or '-'}: {template.text}")
+        if template.count > 1 and template.first_seen:
+            print(f"{indent}    first {template.first_seen}, last {template.last_seen}")
+        if template.example != template.text:
+            print(f"{indent}    e.g. {template.example}")
+
+def print_bucket(start, rows, burst):
+    for idx, row in enumerate(rows):
+        marker = "🔥" if burst and idx == 0 else "  "
+        label = start if idx == 0 else ""
+        message = row["message"] if len(row["message"]) <= 100 else row["message"][:97] + "..."
+        print(f"{marker} {label:<21} {row['service'] or '-':<14} {row['count']:>4}x {row['pattern']:<16} {message}", flush=True)
+
+def print_report(result, compose_name, live=False, per_service=None):
+    if not result.total:
         print("✅ No obvious errors found in recent logs.")
+        return
+
+    distinct = len(result.templates.templates)
+    if live:
+        print(f"\n⚠️  Found {result.total} potential issues in {distinct} distinct messages (first ones shown above).")
+    else:
+        print(f"\n⚠️  Found {result.total} potential issues in {distinct} distinct messages:")
+    if per_service:
+        for service, service_result in sorted(per_service.items(), key=lambda item: -item[1].total):
+            if not service_result.total:
+                continue
+            print(f"\n🔸 {service}: {service_result.total} ({service_result.severity_summary()})")
+            print_templates(service_result.templates.top(3), indent="   ")
+    else:
+        print_templates(result.templates.top())
+    if result.templates.evicted:
+        print(f"   ({result.templates.evicted} rarely seen messages dropped to keep memory bounded)")
+
+    service_summary = ", ".join(f"{name} {count}" for name, count in result.by_service.most_common(5))
+    print(f"\n📊 By severity: {result.severity_summary()}")
+    print(f"📊 Noisiest services: {service_summary}")
+    heavy = result.heavy_hitters(5)
+    if heavy:
+        print("📊 Most frequent messages:")
+        for service, message, count, error in heavy:
+            bound = f" (±{error})" if error else ""
+            print(f"   - {count}x{bound} {service or '-'}: {message}")
+
+    spikes = result.spikes()
+    if spikes:
+        print(f"\n📈 Error-rate spikes ({len(spikes)}, latest shown):")
+        for service, minute, lines, errors, baseline in spikes[-MAX_SAMPLES:]:
+            print(f"   - {format_minute(minute)} {service or '-'}: {errors} errors/min (usually ~{baseline:.1f}, {lines} lines logged that minute)")
+
+    print(f"\n💡 Recommendation: Check the lines above. Use '{compose_name} logs <service>' for more details.")
+
+def analyze_logs(container_name="all", since=None, until=None, tail="100", live=False, jobs=16,
+                 compose_file="docker-compose.yml", source="auto", incremental=False, state_file=DEFAULT_STATE_FILE,
+                 archive_dir=None, retention_days=ARCHIVE_RETENTION_DAYS, docker_root=DOCKER_CONTAINERS_DIR, output="text",
+                 timeline=False, lookahead=TIMELINE_LOOKAHEAD, history=None):
+    text = output == "text"
+    if text:
+        print(f"🧠 Analyzing logs for: {container_name}...")
+
+    meta = {
+        "target": container_name,
+        "window": {"since": since, "until": until, "tail": tail},
+        "incremental": incremental,
+    }
+    lock = threading.Lock()
+    shown = []
+
+    def show(line, finding, stamp):
+        with lock:
+            if len(shown) < MAX_SAMPLES:
+                shown.append(line)
+                print(f" - [{finding.severity}] {line}", flush=True)
+
+    def stream_template(line, finding, stamp):
+        emit_event("template", **finding_dict(finding, stamp, line))
+
+    on_sample = stream_template if output == "ndjson" else (show if live and text else None)
+    archive = LogArchive(archive_dir, retention_days=retention_days) if archive_dir else None
+
+    try:
+        if history:
+            meta["source"] = "history"
+            compose_name = "docker compose"
+            if output == "ndjson":
+                emit_event("start", **meta)
+            per_service = None
+            result = scan_history(history, since=since, until=until, jobs=jobs, output=output,
+                                  service=None if container_name == "all" else container_name)
+        else:
+            source = select_source(source, compose_file, pool_size=max(1, jobs), docker_root=docker_root)
+            meta["source"] = source.name
+            compose_name = source.compose_name
+            if output == "ndjson":
+                emit_event("start", **meta)
+            cursors = CursorStore(state_file) if incremental else None
+            if container_name != "all":
+                services = [container_name] if incremental or timeline else []
+            else:
+                services = source.services() if jobs > 1 or incremental or timeline else []
+            if timeline:
+                per_service = None
+                result, merged, tracker = scan_timeline(source, services, since=since, until=until, tail=tail, lookahead=lookahead,
+                                                        output=output, on_sample=on_sample if not text else None, archive=archive)
+            elif services:
+                result = ScanResult()
+                per_service = {}
+                for service, service_result in collect_per_service(
+                    source, services, since=since, until=until, tail=tail, jobs=jobs, on_sample=on_sample,
+                    cursors=cursors, archive=archive,
+                ):
+                    per_service[service] = service_result
+                    result.merge(service_result)
+                    if output == "ndjson":
+                        emit_event("service", service=service, **service_result.to_dict(template_limit=3))
+                if cursors is not None:
+                    cursors.save()
+                    if text:
+                        print(f"📌 Scanned {result.lines} new lines; cursors saved to {state_file}")
+            else:
+                per_service = None
+                stream = source.open(container_name, since=since, until=until, tail=tail)
+                default_service = None if container_name == "all" else container_name
+                try:
+                    result = scan_lines(stream, LogMatcher(), default_service=default_service, on_sample=on_sample, archive=archive)
+                finally:
+                    stream.close()
+    except Exception as e:
+        if text:
+            print(f"Error reading logs: {e}")
+        elif output == "json":
+            print(json.dumps(dict({"schema": REPORT_SCHEMA, "generated_at": utc_now(), "error": str(e)}, **meta), indent=2))
+        else:
+            emit_event("error", error=str(e))
+        return None
+    finally:
+        if archive is not None:
+            archive.close()
+
+    report = {"schema": REPORT_SCHEMA, "generated_at": utc_now()}
+    report.update(meta)
+    report.update(result.to_dict())
+    if archive is not None:
+        report["archived_lines"] = archive.written
+    if timeline:
+        report["timeline"] = {
+            "lookahead": lookahead,
+            "late_lines": merged.late,
+            "burst_count": tracker.burst_count,
+            "bursts": list(tracker.bursts),
+        }
+
+    if output == "json":
+        print(json.dumps(report, indent=2))
+    elif output == "ndjson":
+        emit_event("summary", report=report)
+    else:
+        if archive is not None:
+            print(f"🗄️  Archived {archive.written} lines to {archive_dir}")
+        if timeline:
+            if merged.late:
+                print(f"⏱️  {merged.late} lines were more than {lookahead} lines out of order and are shown late")
+            if tracker.burst_count:
+                print(f"🔥 {tracker.burst_count} correlated bursts; the first service listed in each failed first")
+        print_report(result, compose_name, live=live, per_service=per_service)
+    return report
+
+def print_rolling_summary(counter, limit=MAX_SAMPLES, output="text"):
+    now = time.monotonic()
+    per_window = [(label, counter.totals(seconds, now)) for label, seconds in counter.windows]
+    longest = per_window[-1][1]
+    ranked = sorted(longest, key=lambda key: [totals[key] for _, totals in per_window], reverse=True)
+    if output == "ndjson":
+        counts = [
+            dict({"service": service, "pattern": pattern_name}, **{label: totals[(service, pattern_name)] for label, totals in per_window})
+            for service, pattern_name in ranked
+        ]
+        emit_event("rolling", windows=[label for label, _ in per_window], counts=counts)
+        return
+    header = " / ".join(label for label, _ in per_window)
+    print(f"\n📈 [{time.strftime('%H:%M:%S')}] Rolling findings ({header}):", flush=True)
+    if not longest:
+        print("   ✅ No findings in the last window.", flush=True)
+        return
+    for service, pattern_name in ranked[:limit]:
+        counts = " / ".join(str(totals[(service, pattern_name)]) for _, totals in per_window)
+        print(f"   {service or '-':<16} {pattern_name:<28} {counts}", flush=True)
+
+def follow_logs(container_name="all", since=None, tail="0", interval=60, threshold=None,
+                compose_file="docker-compose.yml", source="auto", archive_dir=None, retention_days=ARCHIVE_RETENTION_DAYS,
+                output="text"):
+    text = output == "text"
+    if text:
+        print(f"👀 Following logs for: {container_name} (summary every {interval}s, Ctrl+C to stop)...", flush=True)
+
+    matcher = LogMatcher()
+    counter = RollingCounter()
+    alert_window = counter.windows[0][1]
+    last_alert = {}
+    archive = LogArchive(archive_dir, retention_days=retention_days) if archive_dir else None
+
+    try:
+        stream = select_source(source, compose_file).open(container_name, since=since, tail=tail, follow=True)
+    except Exception as e:
+        if text:
+            print(f"Error reading logs: {e}")
+        else:
+            emit_event("error", error=str(e))
+        return
+    if not text:
+        emit_event("start", target=container_name, window={"since": since, "tail": tail}, follow=True)
+
+    # A bounded queue between the stream reader and the aggregator gives us a
+    # wake-up for periodic summaries without letting a burst pile up in memory
+    lines = queue.Queue(maxsize=10000)
+
+    def pump():
+        try:
+            for line in stream:
+                lines.put(line)
+        finally:
+            lines.put(None)
+
+    def count(event, now):
+        finding = event.finding
+        if finding is None:
+            return
+        key = (finding.service or container_name, finding.pattern)
+        counter.add(key, now)
+        if threshold and now - last_alert.get(key, -alert_window) >= alert_window:
+            recent = counter.count(key, alert_window, now)
+            if recent >= threshold:
+                last_alert[key] = now
+                if text:
+                    print(f"🚨 {key[0]}: {recent}x {finding.pattern} ({finding.severity}) in the last {counter.windows[0][0]}", flush=True)
+                    print(f"   {event.text}", flush=True)
+                else:
+                    emit_event("alert", window=counter.windows[0][0], count=recent, **finding_dict(finding, event.stamp, event.text))
+
+    stitcher = MultilineStitcher()
+    threading.Thread(target=pump, daemon=True).start()
+    next_summary = time.monotonic() + interval
+    next_expire = time.monotonic() + STITCH_IDLE_SECONDS
+    try:
+        while True:
+            try:
+                line = lines.get(timeout=1)
+            except queue.Empty:
+                line = ""
+            if line is None:
+                for event in stitcher.close():
+                    count(event, time.monotonic())
+                if text:
+                    print("\n⚠️  Log stream ended.")
+                else:
+                    emit_event("end")
+                break
+            now = time.monotonic()
+            if line:
+                container, service, message = split_container(line)
+                stamp, message = split_timestamp(message)
+                finding = matcher.classify(message, service)
+                if archive is not None:
+                    archive.add(stamp, service or container_name, message, finding)
+                closed = stitcher.feed(container, service or container_name, stamp, line, message, finding, now)
+                if closed is not None:
+                    count(closed, now)
+            if now >= next_expire:
+                for event in stitcher.expire(now - STITCH_IDLE_SECONDS):
+                    count(event, now)
+                next_expire = now + 1
+            if now >= next_summary:
+                print_rolling_summary(counter, output=output)
+                if archive is not None:
+                    archive.flush()
+                next_summary = now + interval
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stream.close()
+        if archive is not None:
+            archive.close()
+    print_rolling_summary(counter, output=output)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scan docker compose logs for likely problems.")
+    parser.add_argument("container", nargs="?", default="all", help="Service to scan (default: all)")
+    parser.add_argument("--since", help="Only logs newer than this (e.g. 2h, 2025-12-20T01:00:00)")
+    parser.add_argument("--until", help="Only logs older than this (same formats as --since)")
+    parser.add_argument("--tail", help="Lines per container to read, or 'all' (default: 100, or 0 with --follow)")
+    parser.add_argument("--stream", action="store_true", help="Print findings as soon as they are found")
+    parser.add_argument("--jobs", type=int, default=16, help="Services fetched concurrently when scanning 'all' (1 = single interleaved call)")
+    parser.add_argument("--compose-file", default="docker-compose.yml", help="Compose file used to list services (default: docker-compose.yml)")
+    parser.add_argument("--source", choices=["auto", "api", "cli", "files"], default="auto",
+                        help="Read logs from the Docker socket (api), the compose CLI, or json-file logs on disk (files); "
+                             "default: api when the socket is reachable")
+    parser.add_argument("--docker-root", default=DOCKER_CONTAINERS_DIR,
+                        help=f"Container directory read by --source files (default: {DOCKER_CONTAINERS_DIR})")
+    parser.add_argument("--incremental", action="store_true", help="Only scan lines newer than the saved per-service cursors, then advance them")
+    parser.add_argument("--state-file", default=DEFAULT_STATE_FILE, help=f"Cursor file for --incremental (default: {DEFAULT_STATE_FILE})")
+    parser.add_argument("--archive", action="store_true", help="Also write every ingested line into the local SQLite archive")
+    parser.add_argument("--archive-dir", default=DEFAULT_ARCHIVE_DIR, help=f"Archive location (default: {DEFAULT_ARCHIVE_DIR})")
+    parser.add_argument("--retention-days", type=int, default=ARCHIVE_RETENTION_DAYS, help=f"Days of archive to keep (default: {ARCHIVE_RETENTION_DAYS})")
+    parser.add_argument("--search", nargs="?", const="", metavar="TEXT",
+                        help="Query the archive instead of reading logs; filters by the service argument, --since/--until and --severity")
+    parser.add_argument("--severity", choices=SEVERITIES, help="With --search, only lines at or above this severity")
+    parser.add_argument("--limit", type=int, default=50, help="With --search, maximum lines returned (default: 50)")
+    parser.add_argument("--follow", action="store_true", help="Keep tailing logs and report rolling 1m/5m/1h counts")
+    parser.add_argument("--interval", type=int, default=60, help="Seconds between rolling summaries in --follow mode (default: 60)")
+    parser.add_argument("--threshold", type=int, help="In --follow mode, alert when a service/pattern hits this many times in 1m")
+    parser.add_argument("--history", nargs="+", metavar="PATH",
+                        help="Scan rotated/compressed logs instead of live ones: .log, .gz and .tar.gz files or directories "
+                             "(e.g. backups/), one worker process per file; --jobs caps the workers")
+    parser.add_argument("--timeline", action="store_true",
+                        help="Merge all services into one timestamp-ordered stream and highlight bursts across services")
+    parser.add_argument("--lookahead", type=int, default=TIMELINE_LOOKAHEAD,
+                        help=f"With --timeline, lines per service that may arrive out of order (default: {TIMELINE_LOOKAHEAD})")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="text",
+                        help=f"Output format; json prints one {REPORT_SCHEMA} document, ndjson streams {EVENT_SCHEMA} events")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
-    container = sys.argv[1] if len(sys.argv) > 1 else "all"
-    analyze_logs(container)
+    args = parse_args()
+    archive_dir = args.archive_dir if args.archive else None
+    if args.search is not None:
+        search_archive(args.search, service=args.container, since=args.since, until=args.until,
+                       severity=args.severity, limit=args.limit, archive_dir=args.archive_dir, output=args.format)
+    elif args.history and (args.incremental or args.timeline or args.archive):
+        sys.exit("--history can't be combined with --incremental, --timeline or --archive")
+    elif args.timeline and args.incremental:
+        sys.exit("--timeline reads whole windows; it can't be combined with --incremental")
+    elif args.follow:
+        if args.format == "json":
+            sys.exit("--follow streams results; use --format ndjson")
+        follow_logs(args.container, since=args.since, tail=args.tail or "0", interval=args.interval, threshold=args.threshold,
+                    compose_file=args.compose_file, source=args.source,
+                    archive_dir=archive_dir, retention_days=args.retention_days, output=args.format)
+    else:
+        analyze_logs(args.container, since=args.since, until=args.until, tail=args.tail or "100", live=args.stream,
+                     jobs=args.jobs, compose_file=args.compose_file, source=args.source,
+                     incremental=args.incremental, state_file=args.state_file,
+                     archive_dir=archive_dir, retention_days=args.retention_days, docker_root=args.docker_root,
+                     output=args.format, timeline=args.timeline, lookahead=max(1, args.lookahead), history=args.history)
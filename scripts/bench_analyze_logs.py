@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ANALYZER = os.path.join(SCRIPT_DIR, "analyze_logs.py")
+DEFAULT_BENCH_DIR = "data/analyze_logs/bench"
+DEFAULT_SIZES = "10MB,100MB"
+CORPUS_VERSION = 2
+MODES = {
+    # name -> extra analyze_logs arguments
+    "stream": ["--jobs", "1"],
+    "per-service": ["--jobs", "8"],
+}
+UNITS = {"KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+# The analyzer's loop before LogMatcher: case-sensitive substrings, one hit per pattern
+LEGACY_PATTERNS = ["Error", "Exception", "Fatal", "Panic", "Unauthorized"]
+
+# service -> (weight, normal messages, error messages); worded like the real
+# services' output so the analyzer's per-service pattern packs get exercised
+SERVICES = {
+    "sonarr": (6, [
+        "[Info] RssSyncService: RSS Sync Completed. Reports found: {n}, Reports grabbed: 0",
+        "[Info] DownloadDecisionMaker: Processing {n} releases",
+        "[Debug] Api: [GET] /api/v3/queue?page=1&pageSize={n}: 200.OK ({n} ms)",
+    ], [
+        "[Error] QBittorrent: Unable to connect to qBittorrent, please check your settings",
+        "[Warn] HealthCheckService: All download clients are unavailable due to failures",
+        "[Warn] HealthCheckService: All indexers are unavailable due to failures",
+        "[Warn] ImportListSyncService: Failed to fetch import list {n}",
+    ]),
+    "radarr": (5, [
+        "[Info] RefreshMovieService: Updating info for Movie {n}",
+        "[Info] DiskScanService: Completed scanning disk for Movie {n}",
+    ], [
+        "[Error] DownloadedMovieImportService: Import failed, path does not exist or is not accessible by Radarr: /downloads/{n}",
+        "[Error] CommandExecutor: code = Busy (5), message = System.Data.SQLite.SQLiteException (0x800007AF): database is locked",
+    ]),
+    "qbittorrent": (4, [
+        "(N) 2025-12-20T01:{n:02d}:11 - Successfully listening on IP. Protocol: TCP, Port: 6881",
+        "(I) 2025-12-20T01:{n:02d}:12 - Torrent added: ubuntu-{n}.iso",
+    ], [
+        "(W) 2025-12-20T01:{n:02d}:13 - WebAPI login failure. Reason: invalid credentials, attempt count: {n}, IP: ::ffff:10.0.0.{n}, username: admin",
+        "(C) 2025-12-20T01:{n:02d}:14 - File error alert. Torrent: \"ubuntu-{n}.iso\". Reason: \"file_open (/downloads/ubuntu-{n}.iso) error: No space left on device\"",
+    ]),
+    "gluetun": (3, [
+        "INFO [http server] http server listening on [::]:{n}",
+        "INFO [healthcheck] healthy!",
+    ], [
+        "INFO [healthcheck] program has been unhealthy for {n}s: restarting VPN",
+        "ERROR [openvpn] AUTH: Received control message: AUTH_FAILED",
+        "WARN [openvpn] TLS handshake failed, restarting",
+    ]),
+    "authelia": (2, [
+        "time=\"2025-12-20T01:{n:02d}:00Z\" level=info msg=\"request served\" remote_ip=10.0.0.{n}",
+    ], [
+        "time=\"2025-12-20T01:{n:02d}:00Z\" level=error msg=\"Unsuccessful 1FA authentication attempt by user 'admin'\" error=\"authentication failed\" remote_ip=10.0.0.{n}",
+    ]),
+    "plex": (3, [
+        "Jobs: '/usr/lib/plexmediaserver/Plex Transcoder' exit code for process {n} is 0",
+    ], [
+        "ERROR - Failed to stream media, client probably disconnected after {n} bytes",
+    ]),
+    "traefik": (4, [
+        "10.0.0.{n} - - \"GET /api/health HTTP/1.1\" 200 {n} \"-\" \"-\" {n} \"jellyfin@docker\" \"http://172.18.0.{n}:8096\" {n}ms",
+    ], [
+        "level=error msg=\"service \\\"sonarr\\\" error: unable to find the IP address\" providerName=docker",
+    ]),
+}
+TRACE_SERVICES = {"sonarr", "radarr"}
+TRACE_HEADERS = [
+    "System.Net.Http.HttpRequestException: Connection refused ({n})",
+    "System.IO.IOException: Disk full ({n})",
+    "NzbDrone.Core.Download.Clients.DownloadClientException: Failed to connect to qBittorrent ({n})",
+]
+TRACE_FRAMES = [
+    "   at System.Net.Http.HttpConnectionPool.ConnectToTcpHostAsync(String host, Int32 port, CancellationToken token)",
+    "   at NzbDrone.Common.Http.Dispatchers.ManagedHttpDispatcher.GetResponseAsync(HttpRequest request, CookieContainer cookies)",
+    "   at NzbDrone.Common.Http.HttpClient.ExecuteAsync(HttpRequest request)",
+    "   at NzbDrone.Core.Download.Clients.QBittorrent.QBittorrentProxyV2.ProcessRequest(HttpRequestBuilder builder)",
+    "   at NzbDrone.Core.Messaging.Commands.CommandExecutor.ExecuteCommand[TCommand](TCommand command, CommandModel message)",
+]
+
+def parse_size(value):
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMG]B)?\s*", value.upper())
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid size: {value} (use e.g. 10MB, 5GB)")
+    return int(float(match.group(1)) * UNITS.get(match.group(2) or "", 1))
+
+def format_size(size):
+    for unit in ("GB", "MB", "KB"):
+        if size >= UNITS[unit] and size % UNITS[unit] == 0:
+            return f"{size // UNITS[unit]}{unit}"
+    return f"{size}B"
+
+def corpus_path(bench_dir, size, error_rate, trace_rate, seed):
+    return os.path.join(bench_dir, f"corpus-v{CORPUS_VERSION}-{format_size(size)}-e{error_rate}-t{trace_rate}-s{seed}.log")
+
+def corpus_lines(error_rate=0.02, trace_rate=0.2, seed=1337):
+    # Endless deterministic `docker compose logs --timestamps` output, interleaved across services
+    rng = random.Random(seed)
+    names = list(SERVICES)
+    weights = [SERVICES[name][0] for name in names]
+    clock_ns = int(datetime(2025, 12, 20, tzinfo=timezone.utc).timestamp()) * 10 ** 9
+    stamp_second, stamp_prefix = None, ""
+    while True:
+        clock_ns += rng.randint(0, 50_000_000)
+        second, nanos = divmod(clock_ns, 10 ** 9)
+        if second != stamp_second:
+            stamp_second = second
+            stamp_prefix = datetime.fromtimestamp(second, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+        stamp = f"{stamp_prefix}.{nanos:09d}Z"
+        service = rng.choices(names, weights)[0]
+        prefix = f"{service}-1".ljust(14) + "| " + stamp + " "
+        n = rng.randint(0, 59)
+        if rng.random() < error_rate:
+            if service in TRACE_SERVICES and rng.random() < trace_rate:
+                # Multi-line trace: every frame gets the same prefix, as compose prints it
+                event = [rng.choice(TRACE_HEADERS).format(n=n)] + rng.sample(TRACE_FRAMES, rng.randint(3, len(TRACE_FRAMES)))
+            else:
+                event = [rng.choice(SERVICES[service][2]).format(n=n)]
+        else:
+            event = [rng.choice(SERVICES[service][1]).format(n=n)]
+        for message in event:
+            yield prefix + message
+
+def generate_corpus(path, size, error_rate=0.02, trace_rate=0.2, seed=1337):
+    written = lines = 0
+    chunk = []
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        for line in corpus_lines(error_rate, trace_rate, seed):
+            if written >= size:
+                break
+            line += "\n"
+            chunk.append(line)
+            written += len(line)
+            lines += 1
+            if len(chunk) >= 10000:
+                f.write("".join(chunk))
+                chunk.clear()
+        f.write("".join(chunk))
+    os.replace(tmp, path)
+    return lines
+
+def ensure_corpus(bench_dir, size, error_rate, trace_rate, seed):
+    path = corpus_path(bench_dir, size, error_rate, trace_rate, seed)
+    if os.path.exists(path):
+        return path
+    os.makedirs(bench_dir, exist_ok=True)
+    print(f"🧪 Generating {format_size(size)} corpus at {path}...", flush=True)
+    started = time.perf_counter()
+    lines = generate_corpus(path, size, error_rate=error_rate, trace_rate=trace_rate, seed=seed)
+    print(f"   {lines:,} lines in {time.perf_counter() - started:.1f}s", flush=True)
+    return path
+
+STAND_IN = r'''#!/usr/bin/env python3
+# Stand-in for `docker compose` that replays a benchmark corpus
+import os, shutil, sys
+args = sys.argv[1:]
+if args[:2] == ["compose", "version"]:
+    print("Docker Compose version v2 (bench stand-in)")
+    sys.exit(0)
+if "logs" not in args:
+    sys.exit(1)
+service = args[-1] if not args[-1].startswith("-") and args[-1] != "logs" else None
+out = sys.stdout.buffer
+with open(os.environ["BENCH_CORPUS"], "rb") as f:
+    if service is None:
+        shutil.copyfileobj(f, out, 1 << 20)
+    else:
+        prefix = (service + "-").encode()
+        out.writelines(line for line in f if line.startswith(prefix))
+'''
+
+def make_stand_in(directory):
+    docker = os.path.join(directory, "docker")
+    with open(docker, "w") as f:
+        f.write(STAND_IN)
+    os.chmod(docker, 0o755)
+    compose_file = os.path.join(directory, "docker-compose.yml")
+    with open(compose_file, "w") as f:
+        f.write("services:\n" + "".join(f"  {name}:\n    image: bench/{name}\n" for name in SERVICES))
+    return compose_file
+
+def run_analyzer(corpus, mode, stand_in_dir, compose_file):
+    cmd = [sys.executable, ANALYZER, "--source", "cli", "--tail", "all", "--format", "ndjson",
+           "--compose-file", compose_file] + MODES[mode]
+    env = dict(os.environ, BENCH_CORPUS=corpus, PATH=stand_in_dir + os.pathsep + os.environ.get("PATH", ""))
+    started = time.perf_counter()
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, env=env)
+    first_finding = None
+    summary = error = None
+    for raw in proc.stdout:
+        event = json.loads(raw)
+        if event["type"] == "template" and first_finding is None:
+            first_finding = time.perf_counter() - started
+        elif event["type"] == "summary":
+            summary = event["report"]
+        elif event["type"] == "error":
+            error = event["error"]
+    # wait4 instead of wait() so we get the analyzer's own peak RSS
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    elapsed = time.perf_counter() - started
+    if error or summary is None:
+        raise RuntimeError(error or f"analyze_logs exited with {proc.returncode} and no summary")
+    return {
+        "lines": summary["lines_scanned"],
+        "findings": summary["findings"],
+        "templates": summary["templates_total"],
+        "seconds": round(elapsed, 3),
+        "lines_per_sec": round(summary["lines_scanned"] / elapsed),
+        "mb_per_sec": round(os.path.getsize(corpus) / UNITS["MB"] / elapsed, 2),
+        "first_finding_sec": round(first_finding, 3) if first_finding is not None else None,
+        "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),
+    }
+
+def legacy_scan(lines, patterns=LEGACY_PATTERNS):
+    hits = 0
+    for line in lines:
+        for pattern in patterns:
+            if pattern in line:
+                hits += 1
+    return hits
+
+def benchmark_matcher(count, error_rate=0.02, trace_rate=0.2, seed=1337):
+    # In-process: times LogMatcher alone, on the same lines the corpus files hold
+    import analyze_logs
+    from collections import Counter
+
+    lines = list(itertools.islice(corpus_lines(error_rate, trace_rate, seed), count))
+
+    def rate(fn):
+        started = time.perf_counter()
+        hits = fn()
+        return count / (time.perf_counter() - started), hits
+
+    legacy_rate, legacy_hits = rate(lambda: legacy_scan(lines))
+
+    # The old loop extended to the keywords the matcher gates on
+    keywords = []
+    for entry in analyze_logs.BASE_PATTERNS + [p for pack in analyze_logs.SERVICE_PACKS.values() for p in pack]:
+        keywords.extend(k.lower() for k in entry.keywords if k.lower() not in keywords)
+    wide_rate, wide_hits = rate(lambda: legacy_scan([line.lower() for line in lines], keywords))
+
+    patterns = Counter()
+
+    def run_matcher():
+        # Same per-line work as analyze_logs.scan_lines
+        matcher = analyze_logs.LogMatcher()
+        for line in lines:
+            _, service, message = analyze_logs.split_container(line)
+            _, message = analyze_logs.split_timestamp(message)
+            finding = matcher.classify(message, service)
+            if finding:
+                patterns[finding.pattern] += 1
+        return sum(patterns.values())
+
+    matcher_rate, hits = rate(run_matcher)
+
+    print(f"📏 Matcher benchmark over {count:,} corpus lines")
+    print(f"   legacy loop, {len(LEGACY_PATTERNS)} patterns:    {legacy_rate:>12,.0f} lines/sec ({legacy_hits} hits)")
+    print(f"   legacy loop, {len(keywords)} keywords:   {wide_rate:>12,.0f} lines/sec ({wide_hits} hits)")
+    print(f"   compiled matcher:          {matcher_rate:>12,.0f} lines/sec ({hits} lines classified)")
+    print(f"   speedup vs same coverage: {matcher_rate / wide_rate:.2f}x, vs legacy patterns: {matcher_rate / legacy_rate:.2f}x")
+    print("   findings by pattern: " + ", ".join(f"{name} {n}" for name, n in patterns.most_common()))
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=SCRIPT_DIR).stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(results, baseline, tolerance):
+    # Positive delta = better
+    checks = [("lines_per_sec", 1), ("first_finding_sec", -1), ("peak_rss_mb", -1)]
+    regressions = 0
+    print(f"\n📐 Compared with baseline from {baseline.get('created_at')} ({baseline.get('revision') or 'unknown revision'})")
+    for key, current in results.items():
+        previous = baseline["results"].get(key)
+        if previous is None:
+            print(f"   {key:<24} (no baseline)")
+            continue
+        parts = []
+        for metric, direction in checks:
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            delta = (new - old) / old * direction
+            flag = ""
+            if delta < -tolerance:
+                flag = " ⚠️"
+                regressions += 1
+            parts.append(f"{metric} {delta * 100:+.1f}%{flag}")
+        print(f"   {key:<24} " + ", ".join(parts))
+    return regressions
+
+def run_benchmarks(sizes, modes, bench_dir=DEFAULT_BENCH_DIR, error_rate=0.02, trace_rate=0.2, seed=1337, repeat=1):
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench-analyze-logs-") as stand_in_dir:
+        compose_file = make_stand_in(stand_in_dir)
+        for size in sizes:
+            corpus = ensure_corpus(bench_dir, size, error_rate, trace_rate, seed)
+            for mode in modes:
+                # Best of N keeps noise from other processes out of the baseline
+                runs = [run_analyzer(corpus, mode, stand_in_dir, compose_file) for _ in range(repeat)]
+                best = max(runs, key=lambda run: run["lines_per_sec"])
+                key = f"{format_size(size)}/{mode}"
+                results[key] = best
+                first = f"{best['first_finding_sec']:.3f}s" if best["first_finding_sec"] is not None else "-"
+                print(f"   {key:<24} {best['lines_per_sec']:>10,} lines/sec  {best['mb_per_sec']:>7.1f} MB/s  "
+                      f"first finding {first:>7}  peak RSS {best['peak_rss_mb']:>6.1f} MB  "
+                      f"({best['lines']:,} lines, {best['findings']:,} findings, {best['templates']} templates)", flush=True)
+    return results
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark analyze_logs.py on synthetic compose log corpora.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"Comma-separated corpus sizes, 10MB to 5GB (default: {DEFAULT_SIZES})")
+    parser.add_argument("--modes", default="stream", help=f"Comma-separated scan modes: {', '.join(MODES)} (default: stream)")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="Fraction of log events that are warnings/errors (default: 0.02)")
+    parser.add_argument("--trace-rate", type=float, default=0.2, help="Fraction of *arr errors that carry a multi-line stack trace (default: 0.2)")
+    parser.add_argument("--seed", type=int, default=1337, help="Corpus RNG seed (default: 1337)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per scenario; the best one is kept (default: 1)")
+    parser.add_argument("--bench-dir", default=DEFAULT_BENCH_DIR, help=f"Where corpora and the baseline live (default: {DEFAULT_BENCH_DIR})")
+    parser.add_argument("--baseline", help="Baseline file (default: <bench-dir>/baseline.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Relative slowdown reported as a regression (default: 0.10)")
+    parser.add_argument("--matcher", type=int, metavar="LINES", help="Instead of the end-to-end runs, compare LogMatcher with the legacy loop on LINES corpus lines")
+    args = parser.parse_args(argv)
+    args.sizes = [parse_size(size) for size in args.sizes.split(",") if size.strip()]
+    args.modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    unknown = [mode for mode in args.modes if mode not in MODES]
+    if unknown:
+        parser.error(f"unknown mode(s): {', '.join(unknown)}")
+    args.baseline = args.baseline or os.path.join(args.bench_dir, "baseline.json")
+    return args
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.matcher:
+        benchmark_matcher(args.matcher, error_rate=args.error_rate, trace_rate=args.trace_rate, seed=args.seed)
+        sys.exit(0)
+    print(f"📏 Benchmarking {os.path.basename(ANALYZER)} (Python {platform.python_version()}, {os.cpu_count()} CPUs)")
+    try:
+        results = run_benchmarks(args.sizes, args.modes, bench_dir=args.bench_dir, error_rate=args.error_rate,
+                                 trace_rate=args.trace_rate, seed=args.seed, repeat=args.repeat)
+    except (OSError, RuntimeError) as e:
+        sys.exit(f"❌ Benchmark failed: {e}")
+
+    regressions = 0
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "created_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "revision": git_revision(),
+                "python": platform.python_version(),
+                "cpus": os.cpu_count(),
+                "corpus": {"version": CORPUS_VERSION, "error_rate": args.error_rate, "trace_rate": args.trace_rate, "seed": args.seed},
+                "results": results,
+            }, f, indent=2)
+        print(f"\n💾 Baseline saved to {args.baseline}")
+    if regressions:
+        print(f"\n⚠️  {regressions} metric(s) regressed by more than {args.tolerance:.0%}")
+        sys.exit(1)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The scripts are run directly rather than installed, so import them from scripts/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
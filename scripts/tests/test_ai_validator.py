@@ -0,0 +1,42 @@
+import http.client
+import threading
+
+import pytest
+
+from ai_validator import make_server
+
+
+class FakeValidator:
+    verbose = False
+
+    def revalidate(self):
+        return []
+
+    def all_issues(self):
+        return []
+
+
+@pytest.fixture
+def server():
+    server = make_server("127.0.0.1:0", FakeValidator())
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_post_body_does_not_break_keep_alive(server):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=5)
+    try:
+        conn.request("POST", "/validate", body=b'{"files": ["docker-compose.yml"]}',
+                     headers={"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        assert resp.status == 200
+        resp.read()
+        conn.request("GET", "/health")
+        resp = conn.getresponse()
+        assert resp.status == 200
+        assert resp.read().startswith(b'{"ok": true')
+    finally:
+        conn.close()
@@ -0,0 +1,157 @@
+import gzip
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from analyze_logs import (BurstTracker, JsonFileSource, JsonLogFile, LogArchive, LogMatcher, TimelineMerge, iso_utc,
+                          scan_lines)
+
+
+def scan_buckets(*streams):
+    buckets = []
+    tracker = BurstTracker(lambda start, rows, burst: buckets.append((start, rows, burst)))
+    scan_lines(TimelineMerge([list(stream) for stream in streams]), LogMatcher(), on_event=tracker.add)
+    tracker.flush()
+    return buckets, tracker
+
+
+def test_burst_tracker_sees_events_in_timestamp_order():
+    # gluetun's error only closes when gluetun logs again, after the others
+    buckets, tracker = scan_buckets(
+        [
+            "gluetun  | 2024-05-01T00:00:05.000000000Z ERROR VPN connection failed: auth failed",
+            "gluetun  | 2024-05-01T00:00:14.000000000Z INFO healthy again",
+        ],
+        [
+            "qbittorrent  | 2024-05-01T00:00:06.000000000Z ERROR connection refused",
+            "qbittorrent  | 2024-05-01T00:00:07.000000000Z ERROR connection refused",
+        ],
+        ["radarr  | 2024-05-01T00:00:12.000000000Z ERROR download client unavailable"],
+    )
+    assert [(start, [row["service"] for row in rows]) for start, rows, _ in buckets] == [
+        ("2024-05-01T00:00:00Z", ["gluetun", "qbittorrent"]),
+        ("2024-05-01T00:00:10Z", ["radarr"]),
+    ]
+    assert [row["count"] for row in buckets[0][1]] == [1, 2]
+    assert tracker.burst_count == 1
+    assert tracker.bursts[0]["services"] == ["gluetun", "qbittorrent"]
+
+
+def test_burst_tracker_lists_first_failure_first():
+    buckets, _ = scan_buckets(
+        [
+            "qbittorrent  | 2024-05-01T00:00:03.000000000Z ERROR connection refused",
+            "qbittorrent  | 2024-05-01T00:00:04.000000000Z INFO retrying",
+        ],
+        [
+            "gluetun  | 2024-05-01T00:00:01.000000000Z ERROR VPN connection failed",
+            "gluetun  | 2024-05-01T00:00:09.000000000Z INFO retrying",
+        ],
+    )
+    [(_, rows, _)] = buckets
+    assert [row["service"] for row in rows] == ["gluetun", "qbittorrent"]
+
+
+def test_burst_tracker_reports_the_stitched_trace():
+    # The trace is still open when the bucket is flushed at the end of the stream
+    buckets, _ = scan_buckets([
+        "sonarr  | 2024-05-01T00:00:01.000000000Z ERROR Import failed",
+        "sonarr  | 2024-05-01T00:00:01.000000000Z    at NzbDrone.Core.Import()",
+        "sonarr  | 2024-05-01T00:00:01.000000000Z    at NzbDrone.Core.Run()",
+    ])
+    [(_, [row], _)] = buckets
+    assert row["service"] == "sonarr"
+    assert row["count"] == 1
+
+
+def test_archive_expires_old_days_while_running(tmp_path):
+    archive = LogArchive(str(tmp_path), retention_days=7)
+    today = datetime.now(timezone.utc).date()
+    stale = (today - timedelta(days=10)).isoformat()
+    archive.add(f"{stale}T00:00:00.000000000Z", "sonarr", "ERROR old")
+    archive.add(f"{today.isoformat()}T00:00:00.000000000Z", "sonarr", "ERROR new")
+    archive.flush()
+    assert archive.days() == [today.isoformat()]
+    assert archive.written == 1
+
+    # A day directory that ages out while the archive stays open
+    (tmp_path / stale).mkdir()
+    archive.expired_on = today - timedelta(days=1)
+    archive.flush()
+    assert archive.days() == [today.isoformat()]
+    archive.close()
+
+
+def write_json_log(path, seconds):
+    # json-file trims trailing zeros from the fraction, so vary its width
+    lines = [
+        json.dumps({"log": f"line {second}\n", "stream": "stdout", "time": f"2024-05-01T00:{second // 60:02d}:{second % 60:02d}.5Z"})
+        for second in seconds
+    ]
+    data = ("\n".join(lines) + "\n").encode()
+    if path.endswith(".gz"):
+        with gzip.open(path, "wb") as f:
+            f.write(data)
+    else:
+        with open(path, "wb") as f:
+            f.write(data)
+
+
+@pytest.fixture
+def containers_dir(tmp_path):
+    # One sonarr container whose log has rotated twice; .2 was compressed
+    container_id = "a" * 64
+    directory = tmp_path / container_id
+    directory.mkdir()
+    config = {"ID": container_id, "Name": "/media-sonarr-1", "Config": {"Labels": {
+        "com.docker.compose.project": "media", "com.docker.compose.service": "sonarr",
+        "com.docker.compose.container-number": "1"}}}
+    (directory / "config.v2.json").write_text(json.dumps(config))
+    base = str(directory / f"{container_id}-json.log")
+    write_json_log(base + ".2.gz", range(0, 100))
+    write_json_log(base + ".1", range(100, 200))
+    write_json_log(base, range(200, 300))
+    return tmp_path
+
+
+def file_seconds(source, **kwargs):
+    lines = list(source.open("sonarr", **kwargs))
+    assert all(line.startswith("sonarr-1  | 2024-05-01T00:") for line in lines)
+    return [int(line.rpartition(" ")[2]) for line in lines]
+
+
+def test_json_files_read_rotations_oldest_first(containers_dir):
+    source = JsonFileSource(str(containers_dir), project="media")
+    files = source.log_files(str(containers_dir / ("a" * 64)), "a" * 64)
+    assert [os.path.basename(f.path)[64:] for f in files] == ["-json.log.2.gz", "-json.log.1", "-json.log"]
+    assert file_seconds(source, tail="all") == list(range(300))
+
+
+@pytest.mark.parametrize("since, until, expected", [
+    ("2024-05-01T00:03:20Z", None, range(200, 300)),
+    ("2024-05-01T00:03:20.6Z", "2024-05-01T00:03:30Z", range(201, 210)),
+    ("2024-05-01T00:00:00Z", "2024-05-01T00:00:09Z", []),
+    ("2024-05-01T00:00:00Z", None, range(200, 300)),
+    ("2024-05-01T00:05:00Z", None, []),
+])
+def test_json_log_binary_search_window(containers_dir, since, until, expected):
+    log_file = JsonLogFile(str(containers_dir / ("a" * 64) / f"{'a' * 64}-json.log"))
+    lines = log_file.raw_lines(iso_utc(since), iso_utc(until) if until else None)
+    assert [json.loads(raw)["log"].split()[1] for raw in lines] == [str(second) for second in expected]
+
+
+def test_json_files_window_spans_rotations(containers_dir):
+    source = JsonFileSource(str(containers_dir), project="media")
+    seconds = file_seconds(source, since="2024-05-01T00:01:30Z", until="2024-05-01T00:03:40Z", tail="all")
+    assert seconds == list(range(90, 220))
+
+
+def test_json_files_tail(containers_dir):
+    source = JsonFileSource(str(containers_dir), project="media")
+    assert file_seconds(source, tail="3") == [297, 298, 299]
+    assert file_seconds(source, tail="150") == list(range(150, 300))
+    # The tail is taken inside the window, as the api and cli sources do
+    assert file_seconds(source, since="2024-05-01T00:00:00Z", until="2024-05-01T00:02:00Z", tail="5") == list(range(115, 120))
+    assert file_seconds(source, since="2024-05-01T00:00:00Z", tail="5") == list(range(295, 300))
@@ -0,0 +1,155 @@
+import json
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn, UnixStreamServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from analyze_logs import DockerApiSource, DockerClient, LogStream
+
+CONTAINERS = [
+    {"Id": "c1", "Names": ["/media-sonarr-1"], "Labels": {
+        "com.docker.compose.project": "media", "com.docker.compose.service": "sonarr", "com.docker.compose.container-number": "1"}},
+    {"Id": "c2", "Names": ["/media-radarr-1"], "Labels": {
+        "com.docker.compose.project": "media", "com.docker.compose.service": "radarr", "com.docker.compose.container-number": "1"}},
+]
+
+
+def frame(stream, payload):
+    return struct.pack(">BxxxL", stream, len(payload)) + payload
+
+
+class FakeDocker(BaseHTTPRequestHandler):
+    """Just enough of the Engine API for DockerClient, over HTTP/1.1 keep-alive."""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        path = url.path.partition("/")[2].partition("/")[2] # drop the API version
+        query = parse_qs(url.query)
+        if path == "_ping":
+            self.reply(b"OK", "text/plain")
+        elif path == "containers/json":
+            self.reply(json.dumps(CONTAINERS).encode(), "application/json")
+        elif path == "containers/tty/logs":
+            self.reply(b"2024-05-01T00:00:01.000000000Z plain\r\n2024-05-01T00:00:02.000000000Z text\n", "text/plain")
+        elif path.endswith("/logs") and query.get("follow") == ["1"]:
+            self.follow()
+        elif path.endswith("/logs"):
+            # Frames split lines and interleave stdout (1) with stderr (2)
+            self.reply(frame(1, b"2024-05-01T00:00:01.000000000Z hello wo") + frame(2, b"2024-05-01T00:00:01.500000000Z oops\n")
+                       + frame(1, b"rld\n2024-05-01T00:00:02.000000000Z second\n") + frame(1, b"2024-05-01T00:00:03.000000000Z last"),
+                       "application/vnd.docker.multiplexed-stream")
+        else:
+            self.reply(b'{"message": "not found"}', "application/json", status=404)
+
+    def reply(self, body, kind, status=200):
+        self.send_response(status)
+        self.send_header("Content-Type", kind)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def follow(self):
+        # A followed stream never ends; it stops when the client goes away
+        self.send_response(200)
+        self.send_header("Content-Type", "application/vnd.docker.multiplexed-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            for number in range(100000):
+                data = frame(1, f"2024-05-01T00:00:00.000000000Z line {number}\n".encode())
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+                time.sleep(0.002)
+        except OSError:
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeDockerServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+    connections = 0
+
+
+@pytest.fixture
+def daemon():
+    # Unix socket paths are limited to ~100 bytes, so keep it out of pytest's tmp_path
+    directory = tempfile.mkdtemp(prefix="docker-")
+    server = FakeDockerServer(os.path.join(directory, "docker.sock"), FakeDocker)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def test_logs_demultiplexes_frames(daemon):
+    client = DockerClient(daemon.server_address)
+    assert list(client.logs("c1", timestamps=True)) == [
+        "2024-05-01T00:00:01.500000000Z oops",
+        "2024-05-01T00:00:01.000000000Z hello world",
+        "2024-05-01T00:00:02.000000000Z second",
+        "2024-05-01T00:00:03.000000000Z last",
+    ]
+    # TTY containers send the raw stream
+    assert list(client.logs("tty")) == ["2024-05-01T00:00:01.000000000Z plain", "2024-05-01T00:00:02.000000000Z text"]
+    client.close()
+
+
+def test_connections_are_pooled(daemon):
+    client = DockerClient(daemon.server_address)
+    source = DockerApiSource(client, project="media")
+    assert client.ping()
+    assert source.services() == ["radarr", "sonarr"]
+    lines = list(source.open("all"))
+    assert len(lines) == 8 and lines[0].startswith("radarr-1  | ")
+    assert client.ping()
+    assert daemon.connections == 1
+    client.close()
+
+
+@pytest.mark.parametrize("delay", [0, 0.01, 0.05])
+def test_followed_stream_closes_from_another_thread(daemon, delay, monkeypatch):
+    # Each container is pumped by its own thread; their errors land here
+    errors = []
+    monkeypatch.setattr(threading, "excepthook", lambda args: errors.append(args.exc_value))
+    client = DockerClient(daemon.server_address)
+    source = DockerApiSource(client, project="media")
+    stream = source.open("all", follow=True)
+    assert isinstance(stream, LogStream)
+    lines = []
+
+    def read():
+        try:
+            for line in stream:
+                lines.append(line)
+        except Exception as e:
+            errors.append(e)
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    time.sleep(delay)
+    stream.close()
+    reader.join(5)
+    assert not reader.is_alive()
+    time.sleep(0.1)
+    assert errors == []
+    # The followed connections were closed, not returned to the pool
+    assert client._pool.empty()
+    assert client.ping()
+    client.close()